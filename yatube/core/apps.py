@@ -1,5 +1,21 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+
+        from core.auth import invalidate_cached_user
+        from core.checks import check_ratelimit_cache
+        from core.db import close_unusable_connections
+
+        User = get_user_model()
+        post_save.connect(invalidate_cached_user, sender=User)
+        post_delete.connect(invalidate_cached_user, sender=User)
+        request_started.connect(close_unusable_connections)
+        checks.register(check_ratelimit_cache)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.crypto import constant_time_compare
+
+# Поле, которое в снимок пользователя не попадает.
+UNCACHED_FIELDS = ('password',)
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def cached_fields():
+    """Поля снимка в порядке полей модели, как их ждёт from_db."""
+    return [field.attname
+            for field in get_user_model()._meta.concrete_fields
+            if field.attname not in UNCACHED_FIELDS]
+
+
+def snapshot(user):
+    """Поля пользователя для кэша и хэш сессии вместо хэша пароля."""
+    return {
+        'fields': {name: getattr(user, name) for name in cached_fields()},
+        'session_hash': user.get_session_auth_hash(),
+    }
+
+
+def from_snapshot(data):
+    """Пользователь из снимка; пароль остаётся отложенным полем и
+    загружается из базы только при обращении, например при его смене."""
+    names = cached_fields()
+    user = get_user_model().from_db(
+        DEFAULT_DB_ALIAS, names, [data['fields'][name] for name in names])
+    return user
+
+
+def get_cached_user(request):
+    """Аналог django.contrib.auth.get_user, читающий пользователя из кэша.
+
+    При промахе пользователь загружается обычным способом и кладётся в
+    кэш. Хэш сессии сверяется и для закэшированного снимка, поэтому смена
+    пароля по-прежнему завершает чужие сессии, а отключённый
+    пользователь выходит из системы.
+    """
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    key = user_cache_key(user_id)
+    data = cache.get(key)
+    if data is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, snapshot(user), settings.USER_CACHE_TIMEOUT)
+        return user
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (data['fields']['is_active'] and session_hash
+            and constant_time_compare(session_hash, data['session_hash'])):
+        request.session.flush()
+        return AnonymousUser()
+    user = from_snapshot(data)
+    user.backend = backend_path
+    return user
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+def invalidate_cached_users(user_ids):
+    """Сбрасывает снимки после QuerySet.update() по пользователям: он не
+    шлёт post_save, и снимок жил бы до USER_CACHE_TIMEOUT."""
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,46 @@
+import time
+
+from django.db.backends.sqlite3 import base
+
+from core import metrics
+
+
+def apply_pragmas(connection, pragmas):
+    # busy_timeout первым: смена journal_mode сама ждёт блокировку.
+    names = sorted(pragmas, key=lambda name: name != 'busy_timeout')
+    for name in names:
+        connection.execute(f'PRAGMA {name} = {pragmas[name]}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """sqlite3 с PRAGMA из ключа PRAGMAS настроек базы.
+
+    PRAGMA выполняются для каждого нового соединения, поэтому вместе с
+    CONN_MAX_AGE их цена платится один раз на соединение.
+    """
+    # Включается core.db.immediate() для следующей транзакции.
+    begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.settings_dict.get('PRAGMAS', {}))
+        return connection
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def _start_transaction_under_autocommit(self):
+        if not self.begin_immediate:
+            return super()._start_transaction_under_autocommit()
+        # BEGIN IMMEDIATE сразу берёт блокировку записи: ожидание
+        # busy_timeout происходит здесь, а не посреди транзакции.
+        start = time.perf_counter()
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        finally:
+            metrics.observe_lock_wait(self.alias,
+                                      time.perf_counter() - start)
@@ -0,0 +1,109 @@
+import json
+import math
+import time
+import tracemalloc
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.db import connection
+
+from core.queries import detect_queries
+
+# Пространства имён url, которые прогоняют бенчмарки.
+BENCH_NAMESPACES = ('posts', 'users', 'about')
+
+# Маршруты, которые ломают последующие замеры.
+SKIPPED_ROUTES = ('users:logout',)
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@contextmanager
+def temporary_database(verbosity=0):
+    """Создаёт чистую тестовую базу на время блока, как test runner."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+
+
+def named_routes(namespaces=BENCH_NAMESPACES):
+    """Пары (имя url, набор аргументов) для пространств имён."""
+    for namespace in namespaces:
+        for pattern in import_module(f'{namespace}.urls').urlpatterns:
+            name = f'{namespace}:{pattern.name}'
+            if name not in SKIPPED_ROUTES:
+                yield name, tuple(pattern.pattern.converters)
+
+
+def measure(client, url, iterations, warmup):
+    """Прогоняет GET url и возвращает сводку по задержке и ресурсам."""
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+    with detect_queries() as queries:
+        client.get(url)
+    # Уже запущенный трассировщик (MemoryProfilerMiddleware,
+    # -X tracemalloc) не останавливаем, только сбрасываем его пик.
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        client.get(url)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if started:
+            tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': sum(queries.shapes.values()),
+        'bytes': len(response.content),
+        'peak_alloc_kib': round(peak / 1024, 1),
+    }
+
+
+def find_regressions(results, baseline, threshold,
+                     metrics=('p95_ms', 'queries')):
+    """Сравнивает результаты с базовыми и возвращает список регрессий.
+
+    Регрессия - рост метрики больше чем в (1 + threshold) раз.
+    """
+    regressions = []
+    for route, current in sorted(results.items()):
+        previous = baseline.get(route)
+        if previous is None:
+            continue
+        for metric in metrics:
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(
+                    f'{route}: {metric} {previous[metric]} -> '
+                    f'{current[metric]}')
+    return regressions
+
+
+def write_json(path, data):
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def read_json(path):
+    with open(path) as file:
+        return json.load(file)
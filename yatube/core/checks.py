@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Warning
+
+# Кеши, в которых у каждого процесса свои данные или incr не атомарен.
+UNSHARED_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+)
+
+
+def check_ratelimit_cache(app_configs, **kwargs):
+    """Лимиты частоты хранятся в кеше по умолчанию. С локальным кешем
+    каждый воркер считает свои запросы, и настоящий лимит умножается на
+    число воркеров."""
+    if settings.DEBUG or not settings.RATELIMIT_ENABLED:
+        return []
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if backend not in UNSHARED_CACHES:
+        return []
+    return [Warning(
+        f'Лимиты частоты запросов хранятся в {backend}: счётчики не общие '
+        f'для воркеров или не атомарны.',
+        hint='Задайте MEMCACHED_LOCATION или другой общий кеш в CACHES.',
+        id='core.W001',
+    )]
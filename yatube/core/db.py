@@ -0,0 +1,143 @@
+import contextvars
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+
+
+def close_unusable_connections(**kwargs):
+    """Закрывает постоянные соединения, не прошедшие проверку.
+
+    Вызывается в начале запроса, после close_old_connections Django,
+    чтобы view не получил соединение, оборванное между запросами.
+    """
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+def is_lock_error(error):
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+@contextmanager
+def immediate(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic, начинающий транзакцию с BEGIN IMMEDIATE.
+
+    Внутри уже открытой транзакции работает как обычный atomic.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    if outermost and hasattr(connection, 'begin_immediate'):
+        connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
+
+
+def atomic_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Выполняет func в immediate() и повторяет при блокировке базы.
+
+    Паузы между попытками растут вдвое со случайным разбросом. Внутри
+    чужой транзакции повтор невозможен, и ошибка пробрасывается сразу.
+    """
+    connection = connections[using]
+    attempts = settings.DB_WRITE_RETRIES
+    if connection.in_atomic_block:
+        attempts = 1
+    for attempt in range(attempts):
+        try:
+            with immediate(using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_lock_error(error) or attempt == attempts - 1:
+                raise
+        time.sleep(settings.DB_WRITE_BACKOFF * 2 ** attempt
+                   * random.uniform(0.5, 1.5))
+
+
+class WriteBatcher:
+    """Поток, объединяющий мелкие записи процесса в одну транзакцию.
+
+    Задания, пришедшие в пределах DB_WRITE_BATCH_WINDOW, выполняются
+    одним коммитом; каждое - в своей точке сохранения, так что ошибка
+    одного задания не откатывает остальные.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, func, *args, **kwargs):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        future = Future()
+        # Контекст запроса нужен роутеру баз и метрикам в потоке-писателе.
+        context = contextvars.copy_context()
+        self.queue.put((future, context.run, (func, *args), kwargs))
+        return future
+
+    def collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + settings.DB_WRITE_BATCH_WINDOW
+        while len(batch) < settings.DB_WRITE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            try:
+                results = atomic_write(self.execute, batch)
+            except Exception as error:
+                for future, *_ in batch:
+                    future.set_exception(error)
+                continue
+            for (future, *_), (ok, value) in zip(batch, results):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    @staticmethod
+    def execute(batch):
+        results = []
+        for future, func, args, kwargs in batch:
+            try:
+                with transaction.atomic():
+                    results.append((True, func(*args, **kwargs)))
+            except OperationalError:
+                raise
+            except Exception as error:
+                results.append((False, error))
+        return results
+
+
+batcher = WriteBatcher()
+
+
+def small_write(func, *args, **kwargs):
+    """Мелкая запись: через поток-писатель, если он включён."""
+    if (settings.DB_WRITE_BATCHING
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block):
+        return batcher.submit(func, *args, **kwargs).result()
+    return atomic_write(func, *args, **kwargs)
@@ -0,0 +1,87 @@
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = 'jobs:{}'
+JOBS_INDEX_KEY = 'jobs:index'
+JOBS_KEPT = 50
+
+
+def get_job(job_id):
+    return cache.get(JOB_KEY.format(job_id))
+
+
+def recent_jobs():
+    """Последние задачи, новые первыми.
+
+    Состояние хранится в кеше, поэтому задачи видны всем процессам,
+    только если кеш общий.
+    """
+    ids = cache.get(JOBS_INDEX_KEY, [])
+    jobs = cache.get_many([JOB_KEY.format(job_id) for job_id in ids])
+    return [jobs[JOB_KEY.format(job_id)] for job_id in ids
+            if JOB_KEY.format(job_id) in jobs]
+
+
+def save_job(job):
+    cache.set(JOB_KEY.format(job['id']), job, settings.JOBS_TIMEOUT)
+
+
+def start_job(name, func, total):
+    """Выполняет func(progress) и записывает её прогресс в кеш.
+
+    Если total больше BACKGROUND_JOB_THRESHOLD, func запускается в фоновом
+    потоке, иначе - сразу. progress(n) сообщает, что обработано ещё n из
+    total объектов. Возвращает словарь с состоянием задачи.
+    """
+    job = {
+        'id': uuid.uuid4().hex,
+        'name': name,
+        'total': total,
+        'done': 0,
+        'status': 'running',
+        'error': '',
+        'started': timezone.now(),
+        'finished': None,
+    }
+    save_job(job)
+    ids = cache.get(JOBS_INDEX_KEY, [])
+    cache.set(JOBS_INDEX_KEY, [job['id']] + ids[:JOBS_KEPT - 1], None)
+
+    def progress(done):
+        job['done'] += done
+        save_job(job)
+
+    def run():
+        try:
+            func(progress)
+            job['status'] = 'done'
+        except Exception as error:
+            job['status'] = 'failed'
+            job['error'] = str(error)
+            raise
+        finally:
+            job['finished'] = timezone.now()
+            save_job(job)
+
+    def run_in_thread():
+        try:
+            run()
+        except Exception:
+            logger.exception('Задача %s завершилась ошибкой', name)
+        finally:
+            connections.close_all()
+
+    if total > settings.BACKGROUND_JOB_THRESHOLD:
+        threading.Thread(target=run_in_thread, name=f'job-{job["id"]}',
+                         daemon=True).start()
+    else:
+        run()
+    return job
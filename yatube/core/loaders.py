@@ -0,0 +1,86 @@
+import os
+import time
+
+from django.template import Template, TemplateDoesNotExist, engines
+from django.template.loaders import app_directories, base, cached, filesystem
+
+from core import metrics, tracing
+
+
+class InstrumentedTemplate(Template):
+    """Template, сообщающий метрикам время рендеринга.
+
+    Учитывается только внешний шаблон запроса: время include и extends
+    входит в него и повторно не суммируется. В трассе же у каждого
+    шаблона, включая include, свой спан.
+    """
+
+    def _render(self, context):
+        if tracing.current() is not None:
+            with tracing.span(f'render {self.name}',
+                              **{'template.name': str(self.name)}):
+                return self._measure(context)
+        return self._measure(context)
+
+    def _measure(self, context):
+        state = metrics.current()
+        if state is None:
+            return super()._render(context)
+        outermost = not state.render_depth
+        state.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return super()._render(context)
+        finally:
+            state.render_depth -= 1
+            if outermost:
+                state.render_time += time.perf_counter() - start
+
+
+class InstrumentedLoaderMixin(base.Loader):
+    """Загрузчик, отдающий InstrumentedTemplate.
+
+    Наследует base.Loader, чтобы в CachedLoader встать в MRO перед ним.
+    """
+
+    def get_template(self, template_name, skip=None):
+        tried = []
+        for origin in self.get_template_sources(template_name):
+            if skip is not None and origin in skip:
+                tried.append((origin, 'Skipped'))
+                continue
+            try:
+                contents = self.get_contents(origin)
+            except TemplateDoesNotExist:
+                tried.append((origin, 'Source does not exist'))
+                continue
+            return InstrumentedTemplate(
+                contents, origin, origin.template_name, self.engine,
+            )
+        raise TemplateDoesNotExist(template_name, tried=tried)
+
+
+class FilesystemLoader(InstrumentedLoaderMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(InstrumentedLoaderMixin, app_directories.Loader):
+    pass
+
+
+class CachedLoader(cached.Loader, InstrumentedLoaderMixin):
+    """Кеширующий загрузчик, который тоже отдаёт InstrumentedTemplate."""
+
+
+def precompile_templates():
+    """Разбирает все шаблоны из DIRS заранее, чтобы кеширующий загрузчик
+    не делал этого на первых запросах. Возвращает число шаблонов."""
+    engine = engines['django'].engine
+    compiled = 0
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.relpath(os.path.join(root, name), directory)
+                engine.get_template(path.replace(os.sep, '/'))
+                compiled += 1
+    return compiled
@@ -0,0 +1,217 @@
+import itertools
+import os
+import random
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import requests
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_TOKEN_LENGTH
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from core.bench import percentile
+
+ERROR_HEADER = 'X-Load-Error'
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ErrorHeaderApplication:
+    """Передаёт клиенту текст исключения из view в заголовке ответа.
+
+    Так нагрузочный клиент отличает "database is locked" от прочих 500.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.local = threading.local()
+        got_request_exception.connect(self.record, weak=False)
+
+    def record(self, sender, request=None, **kwargs):
+        exc_type, exc, _ = sys.exc_info()
+        if exc_type is not None:
+            self.local.error = f'{exc_type.__name__}: {exc}'[:200]
+
+    def __call__(self, environ, start_response):
+        self.local.error = None
+
+        def start(status, headers, exc_info=None):
+            if self.local.error:
+                headers.append((ERROR_HEADER,
+                                self.local.error.replace('\n', ' ')))
+            return start_response(status, headers, exc_info)
+
+        return self.application(environ, start)
+
+
+def start_servers(host, port, processes):
+    """Запускает processes процессов с потоковым WSGI-сервером.
+
+    Все процессы принимают соединения на одном сокете. Возвращает адрес
+    сервера и pid процессов.
+    """
+    application = ErrorHeaderApplication(
+        import_string(settings.WSGI_APPLICATION))
+    server = ThreadingWSGIServer((host, port), QuietHandler)
+    server.set_app(application)
+    connections.close_all()
+    pids = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    server.socket.close()
+    return server.server_address, pids
+
+
+def stop_servers(pids):
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+
+def session_cookie(user):
+    """Создаёт сессию пользователя без запроса на вход."""
+    engine = import_string(f'{settings.SESSION_ENGINE}.SessionStore')
+    session = engine()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    def add(self, kind, elapsed, status, error=None):
+        with self.lock:
+            self.timings[kind].append(elapsed)
+            self.statuses[status] += 1
+            if error:
+                self.errors[error] += 1
+
+    def summary(self, duration):
+        total = sum(len(values) for values in self.timings.values())
+        failed = sum(count for status, count in self.statuses.items()
+                     if not isinstance(status, int) or status >= 500)
+        kinds = {}
+        for kind, values in sorted(self.timings.items()):
+            kinds[kind] = {
+                'requests': len(values),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+            }
+        return {
+            'requests': total,
+            'throughput_rps': round(total / duration, 1),
+            'error_rate': round(failed / total, 4) if total else 0,
+            'statuses': {str(key): value
+                         for key, value in self.statuses.items()},
+            'errors': dict(self.errors.most_common()),
+            'kinds': kinds,
+        }
+
+
+class LoadClient(threading.Thread):
+    """Один пользователь, выполняющий запросы по смеси трафика."""
+
+    def __init__(self, base_url, session_key, targets, mix, results,
+                 deadline, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.targets = targets
+        self.kinds, self.weights = zip(*mix.items())
+        self.results = results
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.csrf_token = get_random_string(CSRF_TOKEN_LENGTH,
+                                            CSRF_ALLOWED_CHARS)
+        self.http = requests.Session()
+        self.http.cookies.set(settings.CSRF_COOKIE_NAME, self.csrf_token)
+        self.http.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+        self.following = itertools.cycle(('follow', 'unfollow'))
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            kind = self.rng.choices(self.kinds, self.weights)[0]
+            method, path, data, files = getattr(self, kind)()
+            start = time.perf_counter()
+            try:
+                response = self.http.request(
+                    method, self.base_url + path, data=data, files=files,
+                    headers={'X-CSRFToken': self.csrf_token},
+                    allow_redirects=False, timeout=30)
+            except requests.RequestException as error:
+                self.results.add(kind, (time.perf_counter() - start) * 1000,
+                                 'connection', type(error).__name__)
+                continue
+            error = response.headers.get(ERROR_HEADER)
+            if error is None and response.status_code >= 500:
+                error = f'HTTP {response.status_code}'
+            self.results.add(kind, (time.perf_counter() - start) * 1000,
+                             response.status_code, error)
+
+    def feed(self):
+        path = self.rng.choice((
+            '/',
+            '/follow/',
+            f'/group/{self.rng.choice(self.targets["groups"])}/',
+            f'/profile/{self.rng.choice(self.targets["authors"])}/',
+        ))
+        return 'GET', f'{path}?page={self.rng.randint(1, 5)}', None, None
+
+    def detail(self):
+        post_id = self.rng.choice(self.targets['posts'])
+        return 'GET', f'/posts/{post_id}/', None, None
+
+    def comment(self):
+        post_id = self.rng.choice(self.targets['posts'])
+        return ('POST', f'/posts/{post_id}/comment/',
+                {'text': 'Комментарий нагрузочного теста'}, None)
+
+    def follow(self):
+        author = self.rng.choice(self.targets['authors'])
+        return 'GET', f'/profile/{author}/{next(self.following)}/', None, None
+
+    def post(self):
+        return ('POST', '/create/', {'text': 'Пост нагрузочного теста'},
+                {'image': ('load.gif', SMALL_GIF, 'image/gif')})
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import bench
+from core.loaders import precompile_templates
+from posts.models import Post
+
+ROUTES = ('posts:index', 'posts:group_list', 'posts:profile',
+          'posts:post_detail')
+
+PROFILES = {
+    'development': {'DEBUG': True, 'TEMPLATES': settings.TEMPLATES},
+    'production': {'DEBUG': False,
+                   'TEMPLATES': settings.CACHED_TEMPLATES},
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время запроса к страницам постов с настройками '
+            'разработки (DEBUG, шаблоны читаются с диска) и продакшена '
+            '(кеширующий загрузчик, шаблоны разобраны заранее).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=0,
+                            help='Прогревочных запросов перед замером.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with bench.temporary_database(), override_settings(
+                QUERYCHECK_ENABLED=False, RATELIMIT_ENABLED=False):
+            call_command('seed_scale', users=options['users'],
+                         posts=options['posts'], seed=options['seed'],
+                         stdout=self.stderr)
+            urls = self.urls()
+            for profile, overrides in PROFILES.items():
+                with override_settings(**overrides):
+                    if profile == 'production':
+                        precompile_templates()
+                    client = Client()
+                    for url in urls:
+                        summary = bench.measure(
+                            client, url, options['iterations'],
+                            options['warmup'])
+                        self.stdout.write(
+                            f'{profile:12} {url:40} '
+                            f'p50 {summary["p50_ms"]:8.2f} '
+                            f'p95 {summary["p95_ms"]:8.2f} ms  '
+                            f'{summary["peak_alloc_kib"]:8.1f} KiB')
+
+    def urls(self):
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False).first()
+        kwargs = {
+            'slug': post.group.slug,
+            'username': post.author.username,
+            'post_id': post.pk,
+        }
+        return [reverse(name, kwargs={key: kwargs[key] for key in converters})
+                for name, converters in bench.named_routes(('posts',))
+                if name in ROUTES]
@@ -0,0 +1,94 @@
+import platform
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import bench
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку, число запросов, размер ответа и память '
+            'для каждого именованного url posts, users и about на '
+            'временной базе с синтетическими данными.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--comments-per-post', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--output', help='Куда записать JSON.')
+        parser.add_argument('--baseline', help='JSON прошлого запуска.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост p95 и числа запросов.')
+
+    def handle(self, *args, **options):
+        dataset = {key: options[key] for key in (
+            'users', 'posts', 'follows_per_user', 'comments_per_post',
+            'seed')}
+        with bench.temporary_database(), override_settings(
+                DEBUG=False, QUERYCHECK_ENABLED=False,
+                RATELIMIT_ENABLED=False):
+            call_command('seed_scale', stdout=self.stderr, **dataset)
+            results = self.run(options['iterations'], options['warmup'])
+        data = {
+            'meta': {
+                'dataset': dataset,
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'routes': results,
+        }
+        for route, summary in sorted(results.items()):
+            self.stdout.write(
+                f'{route:40} {summary["status"]} '
+                f'p50 {summary["p50_ms"]:8.2f} p95 {summary["p95_ms"]:8.2f} '
+                f'p99 {summary["p99_ms"]:8.2f} ms  '
+                f'{summary["queries"]:3} q  {summary["bytes"]:8} B  '
+                f'{summary["peak_alloc_kib"]:8.1f} KiB')
+        if options['output']:
+            bench.write_json(options['output'], data)
+        if options['baseline']:
+            regressions = bench.find_regressions(
+                results, bench.read_json(options['baseline'])['routes'],
+                options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions))
+
+    def sample_kwargs(self):
+        """Аргументы url для самых нагруженных автора, группы и поста."""
+        authors = User.objects.annotate(
+            posts_count=Count('posts')).order_by('-posts_count')
+        me, other = authors[:2]
+        post = (me.posts.annotate(comments_count=Count('comments'))
+                .order_by('-comments_count').first())
+        group = Group.objects.annotate(
+            posts_count=Count('posts')).order_by('-posts_count').first()
+        return me, {
+            'username': other.username,
+            'slug': group.slug,
+            'post_id': post.pk,
+        }
+
+    def run(self, iterations, warmup):
+        me, kwargs = self.sample_kwargs()
+        authorized_client = Client()
+        authorized_client.force_login(me)
+        clients = {'anonymous': Client(), 'authorized': authorized_client}
+        results = {}
+        for name, converters in bench.named_routes():
+            url = reverse(name, kwargs={key: kwargs[key]
+                                        for key in converters})
+            for label, client in clients.items():
+                results[f'{name}|{label}'] = bench.measure(
+                    client, url, iterations, warmup)
+        return results
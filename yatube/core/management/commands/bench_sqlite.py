@@ -0,0 +1,121 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.backends.sqlite3.base import apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    pub_date TEXT NOT NULL
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE INDEX post_author ON post (author_id);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE INDEX comment_post ON comment (post_id);
+'''
+
+FEED = ('SELECT id, author_id, text, pub_date FROM post '
+        'ORDER BY pub_date DESC LIMIT 10 OFFSET ?')
+COUNT = 'SELECT COUNT(*) FROM post'
+COMMENTS = 'SELECT id, author_id, text FROM comment WHERE post_id = ?'
+INSERT = ('INSERT INTO comment (post_id, author_id, text, created) '
+          "VALUES (?, ?, ?, datetime('now'))")
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite со стандартными '
+            'настройками и с SQLITE_PRAGMAS при смешанной нагрузке '
+            'чтения и записи из нескольких потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.2)
+        parser.add_argument('--posts', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        profiles = {
+            'default': {},
+            'tuned': settings.SQLITE_PRAGMAS,
+        }
+        for name, pragmas in profiles.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.create(path, options['posts'])
+                ops, errors, elapsed = self.run(path, pragmas, options)
+            self.stdout.write(
+                f'{name:8} {sum(ops.values()) / elapsed:10.1f} оп/с  '
+                f'чтений {ops["read"]:7}  записей {ops["write"]:6}  '
+                f'ошибок {sum(errors.values()):5} {dict(errors)}')
+
+    def create(self, path, posts):
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        rng = random.Random(0)
+        connection.executemany(
+            "INSERT INTO post (author_id, text, pub_date) "
+            "VALUES (?, ?, datetime('now', ?))",
+            ((rng.randint(1, 1000), 'текст ' * rng.randint(10, 200),
+              f'-{number} minutes') for number in range(posts)))
+        connection.commit()
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        ops = Counter()
+        errors = Counter()
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def worker(seed):
+            rng = random.Random(seed)
+            connection = sqlite3.connect(path, isolation_level=None)
+            apply_pragmas(connection, pragmas)
+            local_ops, local_errors = Counter(), Counter()
+            while time.monotonic() < deadline:
+                post_id = rng.randint(1, options['posts'])
+                try:
+                    if rng.random() < options['write_ratio']:
+                        connection.execute('BEGIN IMMEDIATE')
+                        connection.execute(
+                            INSERT, (post_id, rng.randint(1, 1000), 'текст'))
+                        connection.execute('COMMIT')
+                        local_ops['write'] += 1
+                    else:
+                        connection.execute(
+                            FEED, (rng.randint(0, 100) * 10,)).fetchall()
+                        connection.execute(COUNT).fetchone()
+                        connection.execute(COMMENTS, (post_id,)).fetchall()
+                        local_ops['read'] += 1
+                except sqlite3.OperationalError as error:
+                    local_errors[str(error)] += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            with lock:
+                ops.update(local_ops)
+                errors.update(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(number,))
+                   for number in range(options['threads'])]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return ops, errors, time.monotonic() - start
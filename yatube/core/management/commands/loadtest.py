@@ -0,0 +1,104 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import override_settings
+
+from core.loadtest import (LoadClient, Results, session_cookie,
+                           start_servers, stop_servers)
+from posts.models import Group, Post, User
+
+DEFAULT_MIX = 'feed=70,detail=15,comment=8,follow=5,post=2'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, weight = part.split('=')
+        if kind not in ('feed', 'detail', 'comment', 'follow', 'post'):
+            raise CommandError(f'Неизвестный вид трафика: {kind}')
+        mix[kind] = float(weight)
+    return mix
+
+
+class Command(BaseCommand):
+    help = ('Запускает yatube.wsgi.application на локальном многопоточном '
+            'и многопроцессном WSGI-сервере и нагружает его клиентами. '
+            'Пишет в текущую базу и MEDIA_ROOT: запускайте на копии '
+            'данных, например после seed_scale. Только для Unix (fork).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--mix', default=DEFAULT_MIX)
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep-ratelimit', action='store_true',
+                            help='Не отключать лимиты частоты запросов.')
+        parser.add_argument('--output', help='Куда записать JSON.')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        targets, users = self.targets(options['clients'])
+        overrides = {'DEBUG': False, 'QUERYCHECK_ENABLED': False}
+        if not options['keep_ratelimit']:
+            overrides['RATELIMIT_ENABLED'] = False
+        with override_settings(**overrides):
+            sessions = [session_cookie(user) for user in users]
+            (host, port), pids = start_servers(
+                options['host'], options['port'], options['processes'])
+        results = Results()
+        deadline = time.monotonic() + options['duration']
+        clients = [
+            LoadClient(f'http://{host}:{port}', sessions[number % len(users)],
+                       targets, mix, results, deadline,
+                       options['seed'] + number)
+            for number in range(options['clients'])
+        ]
+        start = time.monotonic()
+        try:
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+        finally:
+            stop_servers(pids)
+        summary = results.summary(time.monotonic() - start)
+        summary['options'] = {key: options[key] for key in (
+            'clients', 'processes', 'duration', 'mix')}
+        self.report(summary)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(summary, file, indent=2, ensure_ascii=False)
+
+    def targets(self, clients):
+        authors = list(User.objects.annotate(posts_count=Count('posts'))
+                       .order_by('-posts_count')[:max(clients, 50)])
+        if not authors or not Post.objects.exists():
+            raise CommandError('В базе нет данных, запустите seed_scale.')
+        targets = {
+            'authors': [author.username for author in authors],
+            'groups': list(Group.objects.values_list('slug', flat=True)
+                           [:50]) or ['-'],
+            'posts': list(Post.objects.order_by('-pk')
+                          .values_list('pk', flat=True)[:1000]),
+        }
+        connections.close_all()
+        return targets, authors[:clients]
+
+    def report(self, summary):
+        self.stdout.write(
+            f'Запросов: {summary["requests"]}, '
+            f'{summary["throughput_rps"]} rps, '
+            f'ошибок: {summary["error_rate"]:.2%}')
+        for kind, data in summary['kinds'].items():
+            self.stdout.write(
+                f'  {kind:8} {data["requests"]:7} p50 {data["p50_ms"]:8.2f} '
+                f'p95 {data["p95_ms"]:8.2f} p99 {data["p99_ms"]:8.2f} ms')
+        self.stdout.write(f'Статусы: {summary["statuses"]}')
+        for error, count in summary['errors'].items():
+            self.stdout.write(f'  {count:6} {error}')
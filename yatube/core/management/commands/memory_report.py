@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core import memory
+
+
+class Command(BaseCommand):
+    help = ('Сводка замеров памяти MemoryProfilerMiddleware: пиковая память '
+            'и места, где после запросов осталось больше всего памяти, '
+            'по каждому url.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Только этот url, например '
+                                           'posts:post_detail.')
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        reports = memory.report()
+        if options['view']:
+            reports = {options['view']: reports[options['view']]} if (
+                options['view'] in reports) else {}
+        if not reports:
+            self.stdout.write('Замеров нет.')
+            return
+        for view, report in sorted(reports.items(),
+                                   key=lambda item: -item[1].peak):
+            self.stdout.write(
+                f'{view}: замеров {report.requests}, пик '
+                f'{report.peak / 1024:.1f} КиБ, в среднем '
+                f'{report.mean_peak / 1024:.1f} КиБ')
+            if report.concurrent:
+                self.stdout.write(
+                    f'  не учтено замеров с параллельными запросами: '
+                    f'{report.concurrent}')
+            for site, size in report.top(options['top']):
+                self.stdout.write(f'{size / 1024:10.1f} КиБ  {site}')
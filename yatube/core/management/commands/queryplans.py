@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import queries
+
+
+class Command(BaseCommand):
+    help = ('Отчёт по планам запросов, снятым QueryPlanMiddleware: формы '
+            'запросов, которые читают всю таблицу или сортируют во '
+            'временном B-дереве, и места, откуда они выполнены.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.QUERYPLAN_FILE)
+        parser.add_argument('--all', action='store_true',
+                            help='Показать и планы без проблем.')
+        parser.add_argument('--fail', action='store_true',
+                            help='Завершиться с ошибкой, если есть '
+                                 'проблемные планы.')
+
+    def handle(self, *args, **options):
+        plans = queries.read_plans(options['file'])
+        problems = [plan for plan in plans.values() if plan.problems]
+        self.stdout.write(f'Форм запросов: {len(plans)}, '
+                          f'без индекса: {len(problems)}')
+        shown = plans.values() if options['all'] else problems
+        for plan in sorted(shown, key=lambda plan: plan.origin):
+            style = self.style.WARNING if plan.problems else str
+            self.stdout.write(style(f'\n[{plan.alias}] {plan.origin}'))
+            self.stdout.write(plan.sql)
+            for detail in plan.details:
+                marker = '!' if detail in plan.problems else ' '
+                self.stdout.write(f'  {marker} {detail}')
+        if problems and options['fail']:
+            raise CommandError(f'Запросов без индекса: {len(problems)}')
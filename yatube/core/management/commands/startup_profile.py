@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = ('Показывает, какие импорты замедляют холодный старт воркера: '
+            'данные -X importtime для wsgi-модуля в новом процессе и время '
+            'до первого ответа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='yatube.wsgi')
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--path', default='/about/author/',
+                            help='Запрос для замера первого ответа.')
+
+    def handle(self, *args, **options):
+        records = startup.importtime(options['module'])
+        total = sum(record.self_us for record in records)
+        self.stdout.write(f'Импорт {options["module"]}: {total / 1000:.1f} '
+                          f'мс, модулей: {len(records)}')
+        self.stdout.write('\nСамые долгие импорты (с вложенными):')
+        for record in sorted(records, key=lambda record: -record.
+                             cumulative_us)[:options['top']]:
+            self.stdout.write(f'{record.cumulative_us / 1000:8.1f} мс  '
+                              f'{"  " * record.depth}{record.name}')
+        self.stdout.write('\nПо пакетам (собственное время):')
+        for package, self_us in startup.by_package(records).most_common(
+                options['top']):
+            self.stdout.write(f'{self_us / 1000:8.1f} мс  {package}')
+        status, seconds, modules = startup.first_response(
+            options['path'], options['module'])
+        self.stdout.write(f'\nПервый ответ {options["path"]}: {status} '
+                          f'через {seconds * 1000:.0f} мс от запуска')
+        eager = startup.eager_modules(modules)
+        if eager:
+            self.stdout.write(self.style.WARNING(
+                'Загружены при старте: ' + ', '.join(eager)))
@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+            'через backup API. С --interval повторяет копирование.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Пауза между копиями, секунды.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.sync()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+        source = sqlite3.connect(primary)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                start = time.perf_counter()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    # Копия согласована: backup видит один снимок базы.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(
+                    f'{alias}: {time.perf_counter() - start:.2f} с')
+        finally:
+            source.close()
@@ -0,0 +1,175 @@
+import glob
+import json
+import os
+import random
+import threading
+import tracemalloc
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+# Кадры самого tracemalloc и импорта модулей к запросу отношения не имеют.
+IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+# tracemalloc общий на процесс: одновременно снимается только один запрос.
+_lock = threading.Lock()
+
+# Сколько запросов процесса выполняется сейчас и сколько начато всего.
+# По ним замер узнаёт, шли ли параллельно другие запросы.
+_activity_lock = threading.Lock()
+_activity = {'running': 0, 'started': 0}
+
+
+@contextmanager
+def request_running():
+    """Учитывает запрос в счётчиках активности процесса."""
+    with _activity_lock:
+        _activity['running'] += 1
+        _activity['started'] += 1
+    try:
+        yield
+    finally:
+        with _activity_lock:
+            _activity['running'] -= 1
+
+
+def activity():
+    with _activity_lock:
+        return _activity['running'], _activity['started']
+
+
+def sampled():
+    rate = settings.MEMORY_PROFILE_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+class Capture:
+    """Результат замера: пиковая память процесса и места, где память
+    осталась занятой, за время запроса.
+
+    tracemalloc видит выделения всех потоков, поэтому цифры относятся к
+    запросу, только если concurrent ложно - других запросов в это время
+    не было. При одном потоке на воркер так всегда.
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self.sites = []
+        self.concurrent = False
+
+
+@contextmanager
+def capture():
+    """Снимки tracemalloc до и после блока.
+
+    Если tracemalloc не был запущен, он работает только внутри блока.
+    Пока замеряется другой запрос, отдаёт None и ничего не снимает.
+    """
+    if not _lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(settings.MEMORY_PROFILE_FRAMES)
+        else:
+            tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        before = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        result = Capture()
+        running, started_before = activity()
+        try:
+            yield result
+        finally:
+            after = tracemalloc.take_snapshot().filter_traces(IGNORED)
+            started_after = activity()[1]
+            # Сам замеряемый запрос уже учтён в running.
+            result.concurrent = (running > 1
+                                 or started_after != started_before)
+            result.peak = tracemalloc.get_traced_memory()[1] - baseline
+            if started:
+                tracemalloc.stop()
+            result.sites = top_sites(after.compare_to(before, 'lineno'))
+    finally:
+        _lock.release()
+
+
+def top_sites(differences, limit=None):
+    limit = limit or settings.MEMORY_PROFILE_TOP
+    sites = []
+    for difference in differences:
+        if difference.size_diff <= 0:
+            continue
+        frame = difference.traceback[0]
+        sites.append({'file': frame.filename, 'line': frame.lineno,
+                      'size': difference.size_diff,
+                      'count': difference.count_diff})
+        if len(sites) == limit:
+            break
+    return sites
+
+
+def save(result, view_name):
+    """Пишет замер в MEMORY_PROFILE_DIR/<url>/ и удаляет старые сверх
+    MEMORY_PROFILE_KEEP. Возвращает имя файла."""
+    directory = os.path.join(settings.MEMORY_PROFILE_DIR,
+                             (view_name or 'unresolved').replace(':', '-'))
+    os.makedirs(directory, exist_ok=True)
+    name = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.json'
+    with open(os.path.join(directory, name), 'w') as output:
+        json.dump({'view': view_name, 'peak': result.peak,
+                   'sites': result.sites, 'concurrent': result.concurrent},
+                  output)
+    for old in sorted(os.listdir(directory))[:-settings.MEMORY_PROFILE_KEEP]:
+        os.remove(os.path.join(directory, old))
+    return name
+
+
+class ViewReport:
+    """Сводка по url только из замеров без параллельных запросов;
+    остальные лишь подсчитываются в concurrent."""
+
+    def __init__(self):
+        self.requests = 0
+        self.concurrent = 0
+        self.peak = 0
+        self.peak_total = 0
+        self.sites = defaultdict(int)
+
+    @property
+    def mean_peak(self):
+        return self.peak_total / self.requests if self.requests else 0
+
+    def top(self, limit):
+        return sorted(self.sites.items(), key=lambda item: -item[1])[:limit]
+
+
+def report():
+    """Складывает сохранённые замеры по имени url: {url: ViewReport}.
+
+    Место - 'файл:строка', значение - сколько байт там осталось занято
+    в сумме по всем замерам.
+    """
+    reports = defaultdict(ViewReport)
+    pattern = os.path.join(settings.MEMORY_PROFILE_DIR, '*', '*.json')
+    for path in glob.glob(pattern):
+        with open(path) as capture_file:
+            data = json.load(capture_file)
+        view = reports[data['view'] or 'unresolved']
+        if data.get('concurrent'):
+            view.concurrent += 1
+            continue
+        view.requests += 1
+        view.peak = max(view.peak, data['peak'])
+        view.peak_total += data['peak']
+        for site in data['sites']:
+            view.sites[f'{site["file"]}:{site["line"]}'] += site['size']
+    return dict(reports)
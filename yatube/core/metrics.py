@@ -0,0 +1,210 @@
+import bisect
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+HELP = {
+    'request_duration_seconds': 'Wall time of the request.',
+    'request_db_duration_seconds': 'Time spent in database queries.',
+    'request_queries': 'Number of database queries per request.',
+    'request_template_duration_seconds': 'Time spent rendering templates.',
+    'response_size_bytes': 'Size of the response body.',
+    'db_lock_wait_seconds': 'Time spent waiting for the write lock.',
+    'request_peak_memory_bytes': 'Peak traced memory of sampled requests.',
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestState:
+    """Счётчики одного запроса, которые собирают middleware и шаблоны."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.view = 'unresolved'
+
+
+def current():
+    return _current.get()
+
+
+def start_request():
+    state = RequestState()
+    return state, _current.set(state)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, data):
+        for index, value in enumerate(data['counts']):
+            self.counts[index] += value
+        self.sum += data['sum']
+        self.count += data['count']
+
+    def as_dict(self):
+        return {'counts': self.counts, 'sum': self.sum, 'count': self.count}
+
+
+class Registry:
+    """Гистограммы метрик процесса с разбивкой по имени url.
+
+    Если задан METRICS_DIR, процесс периодически сбрасывает свои данные в
+    отдельный файл, а collect() складывает файлы всех процессов.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def observe(self, name, view, value):
+        with self.lock:
+            histogram = self.histograms.get((name, view))
+            if histogram is None:
+                histogram = Histogram(settings.METRICS_BUCKETS[name])
+                self.histograms[(name, view)] = histogram
+            histogram.observe(value)
+
+    def dump(self):
+        with self.lock:
+            return [
+                [name, view, histogram.as_dict()]
+                for (name, view), histogram in self.histograms.items()
+            ]
+
+    def path(self):
+        return os.path.join(settings.METRICS_DIR,
+                            f'metrics-{os.getpid()}.json')
+
+    def flush(self, force=False):
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < (
+                settings.METRICS_FLUSH_INTERVAL):
+            return
+        self.last_flush = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = self.path()
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.dump(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        if not settings.METRICS_DIR:
+            return self.histograms_from([self.dump()])
+        self.flush(force=True)
+        dumps = []
+        pattern = os.path.join(settings.METRICS_DIR, 'metrics-*.json')
+        for path in glob.glob(pattern):
+            try:
+                if not process_alive(path):
+                    # Данные умерших воркеров не должны копиться вечно.
+                    os.remove(path)
+                    continue
+                with open(path) as file:
+                    dumps.append(json.load(file))
+            except FileNotFoundError:
+                # Файл удалили после glob: воркер завершился или его
+                # убрал параллельный сбор.
+                continue
+        return self.histograms_from(dumps)
+
+    @staticmethod
+    def histograms_from(dumps):
+        merged = {}
+        for dump in dumps:
+            for name, view, data in dump:
+                histogram = merged.get((name, view))
+                if histogram is None:
+                    histogram = Histogram(settings.METRICS_BUCKETS[name])
+                    merged[(name, view)] = histogram
+                histogram.merge(data)
+        return merged
+
+    def clear(self):
+        with self.lock:
+            self.histograms = {}
+
+
+registry = Registry()
+
+
+def process_alive(path):
+    """Жив ли процесс, записавший файл metrics-<pid>.json."""
+    try:
+        pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+    except ValueError:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def can_read(request):
+    """Доступ к /metrics: персонал, Bearer-токен METRICS_TOKEN или адрес
+    из METRICS_ALLOWED_IPS."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(),
+                                     f'Bearer {token}'.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def render_prometheus(histograms):
+    lines = []
+    for name in sorted({name for name, view in histograms}):
+        metric = f'{settings.METRICS_PREFIX}{name}'
+        lines.append(f'# HELP {metric} {HELP.get(name, name)}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (hist_name, view), histogram in sorted(histograms.items()):
+            if hist_name != name:
+                continue
+            cumulative = 0
+            bounds = [repr(float(b)) for b in histogram.buckets] + ['+Inf']
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{metric}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}')
+            lines.append(f'{metric}_sum{{view="{view}"}} {histogram.sum}')
+            lines.append(
+                f'{metric}_count{{view="{view}"}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def observe_lock_wait(alias, seconds):
+    state = current()
+    view = state.view if state is not None else f'background:{alias}'
+    registry.observe('db_lock_wait_seconds', view, seconds)
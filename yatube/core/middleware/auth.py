@@ -0,0 +1,19 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from core.auth import get_cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware без запроса к auth_user на каждый запрос.
+
+    Снимок пользователя (без хэша пароля) хранится в кэше и сбрасывается
+    при сохранении или удалении пользователя; после QuerySet.update()
+    нужен core.auth.invalidate_cached_users. В многопроцессной
+    конфигурации кэш должен быть общим (memcached, redis), иначе процессы
+    не увидят сброс снимка.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
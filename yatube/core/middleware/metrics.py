@@ -0,0 +1,63 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core import metrics
+
+
+class MetricsMiddleware:
+    """Собирает время, запросы к БД и размер ответа по имени url.
+
+    Должна стоять в начале MIDDLEWARE (после трассировки), чтобы
+    учитывать всю цепочку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.count_query))
+                response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        wall_time = time.perf_counter() - start
+        self.observe(request, response, state, wall_time)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = metrics.current()
+        if state is not None:
+            state.view = request.resolver_match.view_name
+
+    @staticmethod
+    def count_query(execute, sql, params, many, context):
+        state = metrics.current()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if state is not None:
+                state.queries += 1
+                state.db_time += time.perf_counter() - start
+
+    @staticmethod
+    def observe(request, response, state, wall_time):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        registry = metrics.registry
+        registry.observe('request_duration_seconds', view, wall_time)
+        registry.observe('request_db_duration_seconds', view, state.db_time)
+        registry.observe('request_queries', view, state.queries)
+        registry.observe('request_template_duration_seconds', view,
+                         state.render_time)
+        if not response.streaming:
+            registry.observe('response_size_bytes', view,
+                             len(response.content))
+        registry.flush()
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import profiler
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос с подписанным токеном (см. страницу profiles).
+
+    Стоит в конце MIDDLEWARE, чтобы в снимок попали view и рендеринг шаблона,
+    а не остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiler.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        with profiler.capture(mode) as capture:
+            response = self.get_response(request)
+        match = request.resolver_match
+        response['X-Profile-Capture'] = profiler.save(
+            capture, mode, match.view_name if match else None)
+        return response
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.queries import capture_plans, detect_queries
+
+
+class QueryCheckMiddleware:
+    """Ищет N+1 и повторяющиеся запросы (для разработки и стейджинга).
+
+    Включается настройкой QUERYCHECK_ENABLED. При QUERYCHECK_RAISE
+    найденная проблема превращается в исключение, что роняет тесты.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERYCHECK_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_queries() as log:
+            response = self.get_response(request)
+        log.report(request.path)
+        return response
+
+
+class QueryPlanMiddleware:
+    """Снимает EXPLAIN QUERY PLAN с каждой новой формы запроса (для
+    стейджинга).
+
+    Включается настройкой QUERYPLAN_ENABLED. Планы с чтением всей
+    таблицы попадают в лог, все планы - в QUERYPLAN_FILE.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERYPLAN_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_plans():
+            return self.get_response(request)
@@ -0,0 +1,28 @@
+from django.conf import settings
+
+from core.ratelimit import check_request
+
+
+class RateLimitMiddleware:
+    """Лимиты для view, которые нельзя пометить декоратором.
+
+    Настройка RATELIMIT_VIEWS сопоставляет имя url (например,
+    'users:login') со scope из RATELIMIT_RATES. Проверяются только
+    изменяющие запросы.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in self.SAFE_METHODS:
+            return None
+        scope = settings.RATELIMIT_VIEWS.get(
+            request.resolver_match.view_name)
+        if scope is None:
+            return None
+        return check_request(request, scope)
@@ -0,0 +1,35 @@
+from django.conf import settings
+
+from core.routers import replica_state
+
+
+class ReplicaMiddleware:
+    """Read-your-writes для PrimaryReplicaRouter.
+
+    Если запрос что-то записал, ответ ставит cookie, и следующие
+    REPLICA_PIN_SECONDS секунд все чтения этого клиента идут в основную
+    базу, пока реплики догоняют её. Стоит выше SessionMiddleware, чтобы
+    учитывать и запись сессии.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        with replica_state(pinned) as state:
+            request.replica_state = state
+            response = self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+                samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Изменяющий запрос читает то, что собирается менять: только из
+        # основной базы.
+        request.replica_state.allowed = (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.namespace in settings.REPLICA_APPS)
@@ -0,0 +1,78 @@
+from contextlib import ExitStack
+
+from django.db import connections
+
+from core import tracing
+
+
+class TracingMiddleware:
+    """Открывает трассу выбранного запроса и пишет её в TRACING_FILE.
+
+    Стоит первой в MIDDLEWARE. Внутри корневого спана запроса время
+    остальных middleware делится на спаны middleware.request и
+    middleware.response вокруг спана view, см. ViewTracingMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = tracing.sample(request)
+        if sampled is None:
+            return self.get_response(request)
+        trace, token = tracing.start_trace(*sampled)
+        try:
+            root = tracing.start_span(
+                request.method, tracing.SERVER,
+                **{'http.method': request.method,
+                   'http.target': request.get_full_path()})
+            trace.phases['request'] = tracing.start_span('middleware.request')
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(
+                            connection.execute_wrapper(tracing.trace_query))
+                    response = self.get_response(request)
+            except Exception as error:
+                tracing.end_span(root, error)
+                raise
+            match = request.resolver_match
+            if match:
+                root.name = f'{request.method} {match.route or match.url_name}'
+                root.attributes['http.route'] = match.view_name
+            root.attributes['http.status_code'] = response.status_code
+            tracing.end_span(root)
+        finally:
+            tracing.finish_trace(token)
+        return response
+
+
+class ViewTracingMiddleware:
+    """Спан view вокруг вызова view и рендеринга ответа.
+
+    Стоит последней в MIDDLEWARE: всё, что до неё, попадает в спаны
+    middleware.request и middleware.response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = tracing.current()
+        if trace is None:
+            return self.get_response(request)
+        tracing.end_span(trace.phases.pop('request', None))
+        try:
+            return self.get_response(request)
+        finally:
+            tracing.end_span(trace.phases.pop('view', None))
+            trace.phases['response'] = tracing.start_span(
+                'middleware.response')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = tracing.current()
+        if trace is not None:
+            trace.phases['view'] = tracing.start_span(
+                f'view {request.resolver_match.view_name}',
+                **{'code.namespace': view_func.__module__,
+                   'code.function': view_func.__qualname__})
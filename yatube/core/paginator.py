@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, не считающий точно большие выборки.
+
+    Выборку считает COUNT по подзапросу с LIMIT: пока строк не больше
+    ESTIMATED_COUNT_THRESHOLD, число точное. Большую нефильтрованную
+    выборку оценивает по разбросу первичных ключей - это два поиска по
+    индексу вместо прохода по всей таблице; после удалений оценка
+    завышена. С фильтрами или поиском оценка ничего не говорит о числе
+    строк, поэтому такая выборка считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        bounded = queryset.values('pk')[:threshold + 1].count()
+        if bounded <= threshold:
+            return bounded
+        if queryset.query.has_filters() or queryset.query.distinct:
+            return queryset.count()
+        keys = queryset.model._default_manager.aggregate(
+            first=Min('pk'), last=Max('pk'))
+        return max(keys['last'] - keys['first'] + 1, bounded)
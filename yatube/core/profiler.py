@@ -0,0 +1,133 @@
+import cProfile
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+TOKEN_SALT = 'core.profiler'
+HEADER = 'HTTP_X_PROFILE'
+PARAM = 'profile'
+MODES = ('cprofile', 'sampling')
+EXTENSIONS = {'cprofile': '.prof', 'sampling': '.collapsed'}
+
+
+def make_token(user, mode='cprofile'):
+    """Подписанный токен, включающий профилирование запросов user в
+    режиме mode.
+
+    Действует PROFILER_TOKEN_MAX_AGE секунд и только для того же
+    сотрудника: утёкшая ссылка с токеном чужому клиенту бесполезна.
+    """
+    return signing.dumps({'mode': mode, 'user': user.pk}, salt=TOKEN_SALT)
+
+
+def requested_mode(request):
+    """Режим профилирования из заголовка X-Profile или параметра profile.
+
+    None, если токена нет, подпись неверна либо устарела или запрос
+    сделан не сотрудником, для которого выпущен токен.
+    """
+    token = request.META.get(HEADER) or request.GET.get(PARAM)
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT,
+                                max_age=settings.PROFILER_TOKEN_MAX_AGE)
+        mode, user_pk = payload['mode'], payload['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    user = getattr(request, 'user', None)
+    if (user is None or not user.is_active or not user.is_staff
+            or user.pk != user_pk):
+        return None
+    return mode if mode in MODES else None
+
+
+class SamplingProfiler:
+    """Поток, снимающий стек профилируемого потока каждые interval секунд.
+
+    Стеки копятся в формате collapsed stacks для flamegraph.pl.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} '
+                             f'({os.path.basename(code.co_filename)}:'
+                             f'{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+@contextmanager
+def capture(mode):
+    if mode == 'sampling':
+        profiler = SamplingProfiler(settings.PROFILER_SAMPLING_INTERVAL)
+    else:
+        profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+
+def capture_dir(view_name):
+    return os.path.join(settings.PROFILER_DIR,
+                        (view_name or 'unresolved').replace(':', '-'))
+
+
+def save(profiler, mode, view_name):
+    """Сохраняет снимок в PROFILER_DIR/<url>/ и удаляет старые сверх
+    PROFILER_KEEP. Возвращает имя файла."""
+    directory = capture_dir(view_name)
+    os.makedirs(directory, exist_ok=True)
+    name = (f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+            f'{EXTENSIONS[mode]}')
+    profiler.dump_stats(os.path.join(directory, name))
+    for old in sorted(os.listdir(directory))[:-settings.PROFILER_KEEP]:
+        os.remove(os.path.join(directory, old))
+    return name
+
+
+def recent_captures():
+    """{каталог url: [(имя файла, размер)]}, новые снимки первыми."""
+    if not os.path.isdir(settings.PROFILER_DIR):
+        return {}
+    captures = {}
+    for directory in sorted(os.listdir(settings.PROFILER_DIR)):
+        path = os.path.join(settings.PROFILER_DIR, directory)
+        captures[directory] = [
+            (name, os.path.getsize(os.path.join(path, name)))
+            for name in sorted(os.listdir(path), reverse=True)
+        ]
+    return captures
@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends import utils as backend_utils
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+CURSOR_FILE = backend_utils.__file__
+
+# Запросы, для которых SQLite строит план чтения таблиц.
+EXPLAINED = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# Строки SCAN без индекса, которые не означают чтения целой таблицы.
+HARMLESS_SCANS = ('SCAN CONSTANT ROW', 'SCAN SUBQUERY')
+
+# Планы по (база, форма запроса): EXPLAIN выполняется один раз на процесс.
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+class QueryProblem(Exception):
+    pass
+
+
+def normalize_sql(sql):
+    """Приводит запрос к форме, не зависящей от параметров."""
+    sql = IN_LIST.sub('IN (...)', sql)
+    sql = STRING.sub('?', sql)
+    return NUMBER.sub('?', sql)
+
+
+def query_origin():
+    """Находит шаблон или строку проекта, из-за которых выполнен запрос.
+
+    Кадры до CursorWrapper, то есть execute_wrapper-обёртки, пропускаются.
+    """
+    frame = cursor = sys._getframe(1)
+    while cursor is not None and cursor.f_code.co_filename != CURSOR_FILE:
+        cursor = cursor.f_back
+    if cursor is not None:
+        frame = cursor
+    project_line = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        # type() не вычисляет ленивые объекты вроде request.user.
+        if issubclass(type(node), Node) and getattr(node, 'origin', None):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if project_line is None and filename.startswith(settings.BASE_DIR):
+            project_line = (
+                f'{os.path.relpath(filename, settings.BASE_DIR)}:'
+                f'{frame.f_lineno} in {frame.f_code.co_name}')
+        frame = frame.f_back
+    return project_line or 'unknown'
+
+
+class QueryLog:
+    """Запросы одного запроса к сайту и найденные в них повторы."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.shapes = Counter()
+        self.seen = set()
+        self.problems = []
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = normalize_sql(sql)
+        if any(re.search(pattern, shape)
+               for pattern in settings.QUERYCHECK_IGNORED):
+            return execute(sql, params, many, context)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold + 1:
+            self.problems.append(
+                f'{self.threshold + 1}+ запросов вида {shape!r} '
+                f'({query_origin()})')
+        exact = (sql, repr(params))
+        if exact in self.seen:
+            self.problems.append(
+                f'повтор запроса {sql!r} с {params!r} ({query_origin()})')
+        self.seen.add(exact)
+        return execute(sql, params, many, context)
+
+    def report(self, label):
+        if not self.problems:
+            return
+        message = f'{label}: ' + '; '.join(self.problems)
+        if settings.QUERYCHECK_RAISE:
+            raise QueryProblem(message)
+        logger.warning(message)
+
+
+@contextmanager
+def detect_queries(threshold=None):
+    """Собирает запросы ко всем базам внутри блока в QueryLog."""
+    if threshold is None:
+        threshold = settings.QUERYCHECK_REPEAT_THRESHOLD
+    log = QueryLog(threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+
+
+class QueryPlan:
+    """План SQLite для одной формы запроса и найденные в нём проблемы."""
+
+    def __init__(self, alias, shape, sql, origin, details):
+        self.alias = alias
+        self.shape = shape
+        self.sql = sql
+        self.origin = origin
+        self.details = details
+        self.problems = plan_problems(details)
+
+    def as_dict(self):
+        return {'alias': self.alias, 'shape': self.shape, 'sql': self.sql,
+                'origin': self.origin, 'details': self.details}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['alias'], data['shape'], data['sql'],
+                   data['origin'], data['details'])
+
+    def __str__(self):
+        return (f'{self.shape!r} ({self.origin}): '
+                + '; '.join(self.problems or self.details))
+
+
+def plan_problems(details):
+    """Строки плана с чтением всей таблицы или временным B-деревом для
+    сортировки и группировки.
+
+    SQLite до 3.36 пишет SCAN TABLE t, новее - SCAN t; обход по индексу
+    (SCAN t USING INDEX) проблемой не считается.
+    """
+    problems = []
+    for detail in details:
+        if detail.startswith('USE TEMP B-TREE'):
+            problems.append(detail)
+        elif (detail.startswith('SCAN ') and ' USING ' not in detail
+              and not detail.startswith(HARMLESS_SCANS)):
+            problems.append(detail)
+    return problems
+
+
+def explain(connection, sql, params):
+    """План запроса из кеша или новый EXPLAIN QUERY PLAN.
+
+    EXPLAIN идёт через собственный курсор бэкенда, минуя execute_wrapper.
+    Новый план дописывается строкой JSON в QUERYPLAN_FILE, а проблемный
+    ещё и попадает в лог.
+    """
+    shape = normalize_sql(sql)
+    key = (connection.alias, shape)
+    plan = _plans.get(key)
+    if plan is not None:
+        return plan
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        details = [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    plan = QueryPlan(connection.alias, shape, sql, query_origin(), details)
+    with _plans_lock:
+        if key in _plans:
+            return _plans[key]
+        _plans[key] = plan
+        if plan.problems:
+            logger.warning('Запрос без индекса: %s', plan)
+        if settings.QUERYPLAN_FILE:
+            with open(settings.QUERYPLAN_FILE, 'a',
+                      encoding='utf-8') as output:
+                output.write(json.dumps(plan.as_dict(),
+                                        ensure_ascii=False) + '\n')
+    return plan
+
+
+def read_plans(path=None):
+    """Планы из QUERYPLAN_FILE без повторов, по (база, форма запроса)."""
+    path = path or settings.QUERYPLAN_FILE
+    plans = {}
+    if not path or not os.path.exists(path):
+        return plans
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            plan = QueryPlan.from_dict(json.loads(line))
+            plans[(plan.alias, plan.shape)] = plan
+    return plans
+
+
+class PlanLog:
+    """Планы всех запросов внутри блока, см. capture_plans."""
+
+    def __init__(self):
+        self.plans = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        connection = context['connection']
+        if (connection.vendor == 'sqlite' and not many
+                and sql.lstrip().upper().startswith(EXPLAINED)):
+            plan = explain(connection, sql, params)
+            self.plans[(plan.alias, plan.shape)] = plan
+        return result
+
+    @property
+    def problems(self):
+        return [plan for plan in self.plans.values() if plan.problems]
+
+
+@contextmanager
+def capture_plans():
+    """Собирает планы запросов ко всем базам внутри блока в PlanLog."""
+    log = PlanLog()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
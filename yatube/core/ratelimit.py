@@ -0,0 +1,91 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {
+    's': 1,
+    'm': 60,
+    'h': 60 * 60,
+    'd': 24 * 60 * 60,
+}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def consume(bucket, rate):
+    """Учитывает запрос в корзине, возвращает False, если лимит исчерпан.
+
+    Скользящее окно: счётчик текущего окна длиной period складывается с
+    долей счётчика предыдущего окна, ещё не вышедшей из последних period
+    секунд, поэтому на стыке окон двойной лимит не проходит. Счётчики
+    меняются только атомарными cache.add и cache.incr, а отклонённый
+    запрос возвращает свой отсчёт через cache.decr. База не участвует.
+    """
+    count, period = parse_rate(rate)
+    window, elapsed = divmod(time.time(), period)
+    key = f'ratelimit:{bucket}:{int(window)}'
+    cache.add(key, 0, 2 * period)
+    current = cache.incr(key)
+    previous = cache.get(f'ratelimit:{bucket}:{int(window) - 1}', 0)
+    if previous * (1 - elapsed / period) + current > count:
+        cache.decr(key)
+        return False
+    return True
+
+
+def too_many_requests(rate):
+    count, period = parse_rate(rate)
+    response = HttpResponse('Слишком много запросов, попробуйте позже.',
+                            status=429, content_type='text/plain')
+    # Примерно через столько секунд в окне освободится место.
+    response['Retry-After'] = math.ceil(period / count)
+    return response
+
+
+def check_request(request, scope):
+    """Возвращает ответ 429, если запрос превысил лимит `scope`.
+
+    Сначала проверяется корзина IP, затем корзина пользователя. id
+    пользователя берётся из сессии, без запроса к таблице пользователей.
+    """
+    if not settings.RATELIMIT_ENABLED:
+        return None
+    rates = settings.RATELIMIT_RATES[scope]
+    if 'ip' in rates:
+        if not consume(f'{scope}:ip:{client_ip(request)}', rates['ip']):
+            return too_many_requests(rates['ip'])
+    user_id = request.session.get(SESSION_KEY)
+    if 'user' in rates and user_id is not None:
+        if not consume(f'{scope}:user:{user_id}', rates['user']):
+            return too_many_requests(rates['user'])
+    return None
+
+
+def ratelimit(scope, methods=None):
+    """Ограничивает частоту запросов к view по лимитам `scope`.
+
+    `methods` - методы, которые расходуют токены; по умолчанию все.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                response = check_request(request, scope)
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
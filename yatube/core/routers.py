@@ -0,0 +1,71 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    """Можно ли текущему запросу читать с реплик и с какой.
+
+    Реплика выбирается один раз на запрос: иначе, например, COUNT
+    пагинатора и сама страница придут из копий разной свежести.
+    """
+
+    def __init__(self, pinned=False):
+        self.allowed = False
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+    def choose_replica(self):
+        if self.replica is None:
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+        return self.replica
+
+    @property
+    def use_replica(self):
+        return self.allowed and not (self.pinned or self.wrote)
+
+
+@contextmanager
+def replica_state(pinned=False):
+    state = ReplicaState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Пишет в основную базу, чтения view из REPLICA_APPS - на реплики.
+
+    Читать с реплики можно только внутри запроса, разрешённого
+    ReplicaMiddleware. После записи запрос до конца читает основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica:
+            return None
+        if not settings.DATABASE_REPLICAS:
+            return None
+        return state.choose_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+
+ImportRecord = namedtuple('ImportRecord', 'name self_us cumulative_us depth')
+
+# Тяжёлые модули, которые должны загружаться при первом использовании,
+# а не при старте воркера.
+LAZY_MODULES = ('PIL', 'faker', 'requests', 'sorl.thumbnail.engines')
+
+FIRST_RESPONSE_SCRIPT = '''
+import json, sys, time
+from io import BytesIO
+import {module} as wsgi
+statuses = []
+environ = {{
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': {path!r}, 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+    'wsgi.errors': sys.stderr,
+}}
+b''.join(wsgi.application(environ, lambda status, headers: statuses.append(
+    status)))
+print(json.dumps({{'status': statuses[0], 'finished': time.time(),
+                  'modules': sorted(sys.modules)}}))
+'''
+
+
+def _run(args, env=None):
+    return subprocess.run(
+        [sys.executable, *args], cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})}, capture_output=True, text=True,
+        check=True)
+
+
+def importtime(module='yatube.wsgi', env=None):
+    """Импортирует module в новом процессе с -X importtime и возвращает
+    список ImportRecord в порядке завершения импорта."""
+    return parse_importtime(
+        _run(['-X', 'importtime', '-c', f'import {module}'], env).stderr)
+
+
+def parse_importtime(output):
+    """Разбирает вывод -X importtime в список ImportRecord."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        records.append(ImportRecord(
+            name.strip(), int(self_us), int(cumulative_us),
+            (len(name) - len(name.lstrip()) - 1) // 2))
+    return records
+
+
+def by_package(records):
+    """Собственное время импорта, сложенное по пакетам верхнего уровня."""
+    totals = Counter()
+    for record in records:
+        totals[record.name.split('.')[0]] += record.self_us
+    return totals
+
+
+def first_response(path='/', module='yatube.wsgi', env=None):
+    """Запускает новый процесс, импортирует wsgi-модуль и обрабатывает
+    один GET path. Возвращает статус, время от запуска процесса до ответа
+    в секундах и загруженные к этому моменту модули."""
+    script = FIRST_RESPONSE_SCRIPT.format(module=module, path=path)
+    started = time.time()
+    result = json.loads(_run(['-c', script], env).stdout.splitlines()[-1])
+    return result['status'], result['finished'] - started, result['modules']
+
+
+def eager_modules(modules):
+    """Модули из LAZY_MODULES, оказавшиеся среди загруженных modules."""
+    return [name for name in LAZY_MODULES
+            if any(module == name or module.startswith(name + '.')
+                   for module in modules)]
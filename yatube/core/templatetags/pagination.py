@@ -0,0 +1,28 @@
+from django import template
+from django.conf import settings
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj):
+    """Номера страниц для навигации: первая, последняя и PAGE_WINDOW
+    страниц по обе стороны от текущей. None обозначает пропуск.
+
+    Размер списка не зависит от числа страниц, page_range не строится.
+    """
+    number = page_obj.number
+    last = page_obj.paginator.num_pages
+    start = max(number - settings.PAGE_WINDOW, 1)
+    stop = min(number + settings.PAGE_WINDOW, last)
+    pages = []
+    if start > 1:
+        pages.append(1)
+        if start > 2:
+            pages.append(None)
+    pages.extend(range(start, stop + 1))
+    if stop < last:
+        if stop < last - 1:
+            pages.append(None)
+        pages.append(last)
+    return pages
@@ -0,0 +1,25 @@
+import re
+from contextlib import contextmanager
+
+from core.queries import capture_plans
+
+
+class QueryPlanTestMixin:
+    """Проверки планов запросов для TestCase."""
+
+    @contextmanager
+    def assertNoFullScans(self, allowed=()):
+        """Падает, если план запроса внутри блока читает всю таблицу или
+        строит временное B-дерево.
+
+        allowed - регулярные выражения для форм запросов, которым это
+        разрешено.
+        """
+        with capture_plans() as log:
+            yield log
+        problems = [plan for plan in log.problems
+                    if not any(re.search(pattern, plan.shape)
+                               for pattern in allowed)]
+        if problems:
+            self.fail('Запросы без индекса:\n'
+                      + '\n'.join(str(plan) for plan in problems))
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.auth import invalidate_cached_users, user_cache_key
+from posts.models import User
+
+
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user',
+                                            password='old-password')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CachedAuthenticationTests.user)
+
+    def test_page_view_runs_no_auth_queries(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_change_invalidates_snapshot(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_password_change_logs_out(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_snapshot_has_no_password_hash(self):
+        self.authorized_client.get(reverse('about:author'))
+        data = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, repr(data))
+
+    def test_password_is_loaded_on_demand(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = self.authorized_client.get(url).context['user']
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('old-password'))
+
+    def test_inactive_snapshot_logs_out(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        key = user_cache_key(self.user.pk)
+        data = cache.get(key)
+        data['fields']['is_active'] = False
+        cache.set(key, data)
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_bulk_deactivation_with_invalidation_logs_out(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_cached_users([self.user.pk])
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
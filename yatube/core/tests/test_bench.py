@@ -0,0 +1,45 @@
+import tracemalloc
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.bench import find_regressions, measure, named_routes, percentile
+
+
+class BenchHelpersTests(SimpleTestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_regressions_over_threshold(self):
+        baseline = {
+            'posts:index|anonymous': {'p95_ms': 10, 'queries': 2},
+            'posts:profile|anonymous': {'p95_ms': 10, 'queries': 4},
+        }
+        results = {
+            'posts:index|anonymous': {'p95_ms': 11, 'queries': 2},
+            'posts:profile|anonymous': {'p95_ms': 10, 'queries': 5},
+            'posts:new|anonymous': {'p95_ms': 100, 'queries': 50},
+        }
+        self.assertEqual(
+            find_regressions(results, baseline, threshold=0.2),
+            ['posts:profile|anonymous: queries 4 -> 5'])
+
+    def test_named_routes_cover_namespaces(self):
+        routes = dict(named_routes())
+        self.assertEqual(routes['posts:post_detail'], ('post_id',))
+        self.assertIn('about:tech', routes)
+        self.assertNotIn('users:logout', routes)
+
+    def test_measure_keeps_running_tracer(self):
+        client = mock.Mock()
+        client.get.return_value.content = b'ok'
+        tracemalloc.start()
+        try:
+            result = measure(client, '/', iterations=1, warmup=0)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(result['peak_alloc_kib'], 0)
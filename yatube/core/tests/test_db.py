@@ -0,0 +1,80 @@
+import threading
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.db import atomic_write, close_unusable_connections, small_write
+from posts.models import User
+
+
+class SqliteBackendTests(TestCase):
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_unusable_connection_is_closed(self):
+        connection.ensure_connection()
+        self.assertTrue(connection.is_usable())
+        raw_connection = connection.connection
+        # Подменяем соединение закрытым, как будто оно оборвалось.
+        broken = type(raw_connection)(':memory:')
+        broken.close()
+        connection.connection = broken
+        try:
+            self.assertFalse(connection.is_usable())
+            # Базу в памяти Django не закрывает, проверяем сам вызов.
+            with mock.patch.object(connection, 'close') as close:
+                close_unusable_connections()
+            close.assert_called_once_with()
+        finally:
+            connection.connection = raw_connection
+
+
+@override_settings(DB_WRITE_BACKOFF=0)
+class WriteCoordinationTests(TransactionTestCase):
+    def test_transaction_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            atomic_write(User.objects.create, username='user')
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_lock_errors_are_retried(self):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return User.objects.create(username='user')
+
+        atomic_write(write)
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(User.objects.filter(username='user').exists())
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            atomic_write(write)
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(DB_WRITE_BATCHING=True)
+    def test_small_writes_go_through_writer_thread(self):
+        threads = []
+
+        def write(username):
+            threads.append(threading.current_thread())
+            return User.objects.create(username=username)
+
+        user = small_write(write, 'user')
+        self.assertEqual(user.username, 'user')
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertTrue(User.objects.filter(username='user').exists())
@@ -0,0 +1,42 @@
+import importlib
+import os
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.loaders import InstrumentedTemplate, precompile_templates
+
+
+@override_settings(TEMPLATES=settings.CACHED_TEMPLATES)
+class CachedLoaderTests(SimpleTestCase):
+    def test_cached_templates_stay_instrumented(self):
+        engine = engines['django'].engine
+        template = engine.get_template('posts/index.html')
+        self.assertIsInstance(template, InstrumentedTemplate)
+        self.assertIs(engine.get_template('posts/index.html'), template)
+
+    def test_precompile_loads_every_template(self):
+        expected = sum(len(files) for _, _, files in os.walk(
+            settings.TEMPLATES_DIR))
+        self.assertEqual(precompile_templates(), expected)
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertEqual(len(loader.get_template_cache), expected)
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def import_settings(self, environ):
+        sys.modules.pop('yatube.settings_production', None)
+        self.addCleanup(sys.modules.pop, 'yatube.settings_production', None)
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return importlib.import_module('yatube.settings_production')
+
+    def test_secret_key_is_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.import_settings({})
+        production = self.import_settings({'DJANGO_SECRET_KEY': 'секрет'})
+        self.assertEqual(production.SECRET_KEY, 'секрет')
+        self.assertIs(production.TEMPLATES, settings.CACHED_TEMPLATES)
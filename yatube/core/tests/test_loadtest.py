@@ -0,0 +1,46 @@
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from core.loadtest import Results
+from core.management.commands.loadtest import DEFAULT_MIX, parse_mix
+
+
+class ParseMixTests(SimpleTestCase):
+    def test_default_mix(self):
+        self.assertEqual(parse_mix(DEFAULT_MIX), {
+            'feed': 70, 'detail': 15, 'comment': 8, 'follow': 5, 'post': 2})
+
+    def test_fractional_weights(self):
+        self.assertEqual(parse_mix('feed=0.5,post=0.5'),
+                         {'feed': 0.5, 'post': 0.5})
+
+    def test_unknown_kind(self):
+        with self.assertRaisesMessage(CommandError, 'delete'):
+            parse_mix('feed=1,delete=1')
+
+
+class ResultsTests(SimpleTestCase):
+    def test_summary(self):
+        results = Results()
+        for elapsed in range(1, 101):
+            results.add('feed', elapsed, 200)
+        results.add('post', 5, 302)
+        results.add('post', 7, 500, 'OperationalError: database is locked')
+        results.add('comment', 9, 'ConnectionError', 'ConnectionError')
+        summary = results.summary(duration=2)
+        self.assertEqual(summary['requests'], 103)
+        self.assertEqual(summary['throughput_rps'], 51.5)
+        self.assertEqual(summary['error_rate'], round(2 / 103, 4))
+        self.assertEqual(summary['statuses'], {
+            '200': 100, '302': 1, '500': 1, 'ConnectionError': 1})
+        self.assertEqual(summary['errors'], {
+            'OperationalError: database is locked': 1, 'ConnectionError': 1})
+        self.assertEqual(summary['kinds']['feed'], {
+            'requests': 100, 'p50_ms': 50, 'p95_ms': 95, 'p99_ms': 99})
+        self.assertEqual(summary['kinds']['post']['requests'], 2)
+        self.assertEqual(list(summary['kinds']), ['comment', 'feed', 'post'])
+
+    def test_empty_summary(self):
+        summary = Results().summary(duration=1)
+        self.assertEqual((summary['requests'], summary['error_rate'],
+                          summary['kinds']), (0, 0, {}))
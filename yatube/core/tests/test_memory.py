@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import memory
+
+MEMORY_PROFILE_DIR = tempfile.mkdtemp()
+
+LEAKED = []
+
+
+def leaky_feed(queryset):
+    LEAKED.append(bytearray(512 * 1024))
+    return queryset
+
+
+@override_settings(MEMORY_PROFILE_ENABLED=True, MEMORY_PROFILE_SAMPLE_RATE=1,
+                   MEMORY_PROFILE_DIR=MEMORY_PROFILE_DIR)
+class MemoryProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEMORY_PROFILE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(MEMORY_PROFILE_DIR, ignore_errors=True)
+        self.addCleanup(LEAKED.clear)
+
+    def test_sites_and_peak_are_aggregated_per_view(self):
+        with mock.patch('posts.views.feed', leaky_feed):
+            for _ in range(2):
+                response = self.client.get(reverse('posts:index'))
+                # Имена файлов замеров клиенту не показываются.
+                self.assertNotIn('X-Memory-Capture', response)
+        report = memory.report()['posts:index']
+        self.assertEqual(report.requests, 2)
+        self.assertGreaterEqual(report.peak, 512 * 1024)
+        site, size = report.top(1)[0]
+        self.assertIn('test_memory.py', site)
+        self.assertGreaterEqual(size, 2 * 512 * 1024)
+
+    def test_unsampled_request_is_not_captured(self):
+        with self.settings(MEMORY_PROFILE_SAMPLE_RATE=0):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(memory.report(), {})
+
+    def test_report_command(self):
+        with mock.patch('posts.views.feed', leaky_feed):
+            self.client.get(reverse('posts:index'))
+        output = StringIO()
+        call_command('memory_report', view='posts:index', stdout=output)
+        self.assertIn('posts:index: замеров 1', output.getvalue())
+        self.assertIn('test_memory.py', output.getvalue())
+
+    def test_capture_overlapping_other_request_is_not_counted(self):
+        def concurrent_feed(queryset):
+            # Другой запрос процесса начинается во время замера.
+            with memory.request_running():
+                LEAKED.append(bytearray(512 * 1024))
+            return queryset
+
+        with mock.patch('posts.views.feed', concurrent_feed):
+            self.client.get(reverse('posts:index'))
+        report = memory.report()['posts:index']
+        self.assertEqual((report.requests, report.concurrent), (0, 1))
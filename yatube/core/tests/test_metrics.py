@@ -0,0 +1,120 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry, render_prometheus
+from posts.models import Post, User
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        registry.clear()
+        self.guest_client = Client()
+
+    @override_settings(METRICS_ALLOWED_IPS=('127.0.0.1',))
+    def test_metrics_are_exposed_per_url_name(self):
+        self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'user'}))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_count{view="posts:profile"} 1',
+            'yatube_request_queries_bucket{view="posts:profile",le="+Inf"} 1',
+            'yatube_response_size_bytes_count{view="posts:profile"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, body)
+
+    def test_query_count_and_render_time(self):
+        self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'user'}))
+        queries = registry.histograms[('request_queries', 'posts:profile')]
+        self.assertGreater(queries.sum, 0)
+        render = registry.histograms[
+            ('request_template_duration_seconds', 'posts:profile')]
+        self.assertGreater(render.sum, 0)
+
+    @override_settings(METRICS_BUCKETS={'request_queries': (1, 5)})
+    def test_buckets_are_cumulative(self):
+        for value in (1, 3, 10):
+            registry.observe('request_queries', 'posts:index', value)
+        body = render_prometheus(registry.collect())
+        self.assertIn(
+            'yatube_request_queries_bucket{view="posts:index",le="1.0"} 1',
+            body)
+        self.assertIn(
+            'yatube_request_queries_bucket{view="posts:index",le="5.0"} 2',
+            body)
+        self.assertIn(
+            'yatube_request_queries_bucket{view="posts:index",le="+Inf"} 3',
+            body)
+
+    def test_files_of_other_processes_are_merged(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            other = [['request_queries', 'posts:index',
+                      {'counts': [0, 0, 2, 0, 0, 0, 0, 0, 0],
+                       'sum': 6, 'count': 2}]]
+            with open(os.path.join(metrics_dir,
+                                   f'metrics-{os.getppid()}.json'),
+                      'w') as file:
+                json.dump(other, file)
+            with override_settings(METRICS_DIR=metrics_dir):
+                registry.observe('request_queries', 'posts:index', 3)
+                histograms = registry.collect()
+        self.assertEqual(
+            histograms[('request_queries', 'posts:index')].count, 3)
+
+    def test_files_of_dead_processes_are_removed(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            path = os.path.join(metrics_dir, f'metrics-{process.pid}.json')
+            with open(path, 'w') as file:
+                json.dump([['request_queries', 'posts:index',
+                            {'counts': [1, 0, 0, 0, 0, 0, 0, 0, 0],
+                             'sum': 1, 'count': 1}]], file)
+            with override_settings(METRICS_DIR=metrics_dir):
+                histograms = registry.collect()
+            self.assertFalse(os.path.exists(path))
+        self.assertNotIn(('request_queries', 'posts:index'), histograms)
+
+    def test_file_removed_after_glob_is_skipped(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            path = os.path.join(metrics_dir, f'metrics-{os.getppid()}.json')
+            with override_settings(METRICS_DIR=metrics_dir), \
+                    mock.patch('core.metrics.glob.glob', return_value=[path]):
+                registry.observe('request_queries', 'posts:index', 3)
+                histograms = registry.collect()
+        self.assertEqual(histograms, {})
+
+    @override_settings(METRICS_TOKEN='секрет-метрик')
+    def test_metrics_access(self):
+        url = reverse('metrics')
+        self.assertEqual(self.guest_client.get(url).status_code, 403)
+        remote = {'REMOTE_ADDR': '203.0.113.5'}
+        self.assertEqual(
+            self.guest_client.get(url, **remote).status_code, 403)
+        self.assertEqual(self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer неверный', **remote).status_code,
+            403)
+        self.assertEqual(self.guest_client.get(
+            url, HTTP_AUTHORIZATION='Bearer секрет-метрик',
+            **remote).status_code, 200)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.guest_client.force_login(staff)
+        self.assertEqual(
+            self.guest_client.get(url, **remote).status_code, 200)
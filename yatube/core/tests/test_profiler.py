@@ -0,0 +1,83 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.profiler import make_token
+from posts.models import User
+
+PROFILER_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILER_DIR=PROFILER_DIR)
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff',
+                                              is_staff=True)
+        self.client.force_login(self.staff)
+
+    def capture_path(self, response):
+        return os.path.join(PROFILER_DIR, 'posts-index',
+                            response['X-Profile-Capture'])
+
+    def test_request_without_token_is_not_profiled(self):
+        response = self.client.get(reverse('posts:index'),
+                                   {'profile': 'поддельный'})
+        self.assertNotIn('X-Profile-Capture', response)
+
+    def test_cprofile_capture_via_query_parameter(self):
+        response = self.client.get(reverse('posts:index'),
+                                   {'profile': make_token(self.staff)})
+        stats = pstats.Stats(self.capture_path(response))
+        self.assertTrue(any(name == 'index'
+                            for _, _, name in stats.stats))
+
+    def test_sampling_capture_via_header(self):
+        def slow_feed(queryset):
+            time.sleep(0.05)
+            return queryset
+
+        token = make_token(self.staff, 'sampling')
+        with self.settings(PROFILER_SAMPLING_INTERVAL=0.001), \
+                mock.patch('posts.views.feed', slow_feed):
+            response = self.client.get(reverse('posts:index'),
+                                       HTTP_X_PROFILE=token)
+        with open(self.capture_path(response)) as capture:
+            lines = capture.read().splitlines()
+        self.assertTrue(any('slow_feed' in line for line in lines))
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit()
+                            for line in lines))
+
+    def test_token_works_only_for_its_staff_user(self):
+        token = make_token(self.staff)
+        other = User.objects.create_user(username='other', is_staff=True)
+        self.client.force_login(other)
+        response = self.client.get(reverse('posts:index'), {'profile': token})
+        self.assertNotIn('X-Profile-Capture', response)
+        self.client.logout()
+        response = self.client.get(reverse('posts:index'), {'profile': token})
+        self.assertNotIn('X-Profile-Capture', response)
+
+    def test_captures_page_is_staff_only(self):
+        url = reverse('profiles')
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'),
+                                   {'profile': make_token(self.staff)})
+        page = self.client.get(url)
+        self.assertContains(page, response['X-Profile-Capture'])
+        download = self.client.get(reverse(
+            'profile_capture',
+            args=('posts-index', response['X-Profile-Capture'])))
+        self.assertEqual(download.status_code, 200)
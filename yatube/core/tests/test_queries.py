@@ -0,0 +1,135 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import queries
+from core.queries import (QueryProblem, capture_plans, detect_queries,
+                          normalize_sql, plan_problems)
+from core.testing import QueryPlanTestMixin
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class NormalizeSqlTests(TestCase):
+    def test_parameters_do_not_change_shape(self):
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 10'),
+            normalize_sql('SELECT * FROM t WHERE id IN (%s) LIMIT 20'),
+        )
+        self.assertEqual(normalize_sql("SELECT 'a', 1"), 'SELECT ?, ?')
+
+
+@override_settings(QUERYCHECK_ENABLED=True, QUERYCHECK_RAISE=True)
+class QueryCheckTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(10)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(author=cls.follower, post=cls.post, text='Комментарий')
+            for _ in range(10)
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryCheckTests.follower)
+
+    def test_loop_over_relation_is_reported_with_origin(self):
+        with detect_queries(threshold=3) as log:
+            for post in Post.objects.all():
+                post.author.username
+        self.assertTrue(log.problems)
+        self.assertIn('test_queries.py', log.problems[0])
+
+    def test_duplicate_query_is_reported(self):
+        with detect_queries() as log:
+            Post.objects.count()
+            Post.objects.count()
+        self.assertEqual(len(log.problems), 1)
+
+    def test_ignored_shapes_are_not_reported(self):
+        with self.settings(QUERYCHECK_IGNORED=(r'"posts_post"',)):
+            with detect_queries() as log:
+                Post.objects.count()
+                Post.objects.count()
+        self.assertEqual(log.problems, [])
+
+    def test_middleware_raises(self):
+        with override_settings(QUERYCHECK_REPEAT_THRESHOLD=0):
+            with self.assertRaises(QueryProblem):
+                Client().get(reverse('posts:index'))
+
+    def test_pages_have_no_repeated_queries(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'user'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+PLAN_FILE = os.path.join(tempfile.mkdtemp(), 'plans.jsonl')
+
+
+@override_settings(QUERYPLAN_FILE=PLAN_FILE)
+@mock.patch.dict(queries._plans, clear=True)
+class QueryPlanTests(QueryPlanTestMixin, TestCase):
+    def setUp(self):
+        if os.path.exists(PLAN_FILE):
+            os.remove(PLAN_FILE)
+
+    def test_plan_problems(self):
+        self.assertEqual(plan_problems([
+            'SCAN TABLE posts_post',
+            'SCAN posts_group',
+            'SCAN posts_post USING INDEX posts_post_pub_date',
+            'SCAN CONSTANT ROW',
+            'SEARCH auth_user USING INTEGER PRIMARY KEY (rowid=?)',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]), ['SCAN TABLE posts_post', 'SCAN posts_group',
+             'USE TEMP B-TREE FOR ORDER BY'])
+
+    def test_each_shape_is_explained_once(self):
+        with capture_plans() as log:
+            for slug in ('first', 'second'):
+                Group.objects.filter(slug=slug).exists()
+        self.assertEqual(len(log.plans), 1)
+        self.assertEqual(log.problems, [])
+        self.assertEqual(len(queries.read_plans(PLAN_FILE)), 1)
+
+    def test_full_scan_fails_assertion(self):
+        with self.assertRaisesRegex(AssertionError, 'SCAN posts_group'):
+            with self.assertNoFullScans():
+                list(Group.objects.filter(description='Описание').order_by())
+        with self.assertNoFullScans(allowed=[r'"description" = ']):
+            list(Group.objects.filter(description='Описание').order_by())
+
+    def test_report_command(self):
+        with capture_plans():
+            list(Group.objects.filter(description='Описание').order_by())
+            Group.objects.filter(slug='slug').exists()
+        output = StringIO()
+        with self.assertRaisesRegex(Exception, 'без индекса: 1'):
+            call_command('queryplans', fail=True, stdout=output)
+        self.assertIn('Форм запросов: 2, без индекса: 1', output.getvalue())
+        self.assertIn('! SCAN posts_group', output.getvalue())
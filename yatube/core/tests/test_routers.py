@@ -0,0 +1,140 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.middleware.replica import ReplicaMiddleware
+from core.routers import PrimaryReplicaRouter, replica_state
+from posts.models import Comment, Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_replica_only_when_allowed(self):
+        self.assertIsNone(self.router.db_for_read(Post))
+        with replica_state() as state:
+            self.assertIsNone(self.router.db_for_read(Post))
+            state.allowed = True
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_reads_after_write_go_to_primary(self):
+        with replica_state() as state:
+            state.allowed = True
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_pinned_request_reads_primary(self):
+        with replica_state(pinned=True) as state:
+            state.allowed = True
+            self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_no_migrations_on_replicas(self):
+        self.assertIs(self.router.allow_migrate('replica', 'posts'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def get_response(self, write):
+        def view(request):
+            if write:
+                PrimaryReplicaRouter().db_for_write(Post)
+            return HttpResponse()
+        request = RequestFactory().post('/')
+        return ReplicaMiddleware(view)(request)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.get_response(write=True)
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 10)
+
+    def test_read_does_not_pin(self):
+        response = self.get_response(write=False)
+        self.assertNotIn('pin_primary', response.cookies)
+
+
+REPLICAS = ('replica1', 'replica2')
+
+
+@override_settings(DATABASE_REPLICAS=list(REPLICAS))
+class RealReplicaTests(TestCase):
+    """Маршрутизация на настоящие копии базы разной свежести."""
+
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in REPLICAS:
+            path = os.path.join(cls.directory, f'{alias}.sqlite3')
+            target = sqlite3.connect(path)
+            primary.connection.backup(target)
+            target.close()
+            connections.databases[alias] = {
+                'ENGINE': 'core.backends.sqlite3', 'NAME': path}
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        for alias, posts in zip(REPLICAS, (1, 3)):
+            author = User.objects.db_manager(alias).create_user(
+                username='author')
+            Post.objects.using(alias).bulk_create(
+                Post(author=author, text=f'Пост {n}') for n in range(posts))
+
+    def test_request_reads_one_replica(self):
+        for alias in REPLICAS:
+            with self.subTest(alias=alias), \
+                    mock.patch('core.routers.random.choice',
+                               side_effect=[alias, *REPLICAS]):
+                cache.clear()
+                with CaptureQueriesContext(connections[REPLICAS[0]]) as one, \
+                        CaptureQueriesContext(connections[REPLICAS[1]]) as two:
+                    response = self.client.get(reverse('posts:index'))
+                page = response.context['page_obj']
+                self.assertEqual(page.paginator.count, len(page))
+                self.assertEqual(
+                    [bool(one.captured_queries), bool(two.captured_queries)],
+                    [alias == REPLICAS[0], alias == REPLICAS[1]])
+
+    def test_post_request_reads_primary(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {n}') for n in range(4))
+        # На репликах поста с таким pk ещё нет.
+        post = Post.objects.create(author=author, text='Новый пост')
+        self.client.force_login(author)
+        with CaptureQueriesContext(connections[REPLICAS[0]]) as one, \
+                CaptureQueriesContext(connections[REPLICAS[1]]) as two:
+            response = self.client.post(
+                reverse('posts:add_comment', args=[post.pk]),
+                {'text': 'Комментарий'})
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[post.pk]),
+            fetch_redirect_response=False)
+        self.assertTrue(Comment.objects.filter(post=post).exists())
+        self.assertEqual(one.captured_queries + two.captured_queries, [])
@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from core import startup
+
+# С большим запасом на загруженные CI-машины: на рабочей машине первый
+# ответ приходит за ~0.5 с, регрессией считается рост на порядок.
+FIRST_RESPONSE_BUDGET_SECONDS = 10
+
+IMPORTTIME_OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _json
+import time:       300 |        420 |   json.decoder
+import time:       200 |        620 | json
+import time:        50 |         50 |   core.helpers
+import time:        80 |        130 | core.startup
+'''
+
+
+class StartupTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        records = startup.parse_importtime(IMPORTTIME_OUTPUT)
+        self.assertEqual(records[-1],
+                         startup.ImportRecord('core.startup', 80, 130, 0))
+        self.assertEqual(records[0].depth, 2)
+        self.assertEqual(startup.by_package(records),
+                         {'_json': 120, 'json': 500, 'core': 130})
+
+    def test_eager_modules(self):
+        modules = ['django', 'PIL.Image', 'pillow_extra', 'sorl.thumbnail',
+                   'requests']
+        self.assertEqual(startup.eager_modules(modules), ['PIL', 'requests'])
+
+    def test_first_response_fits_budget(self):
+        status, seconds, modules = startup.first_response('/about/author/')
+        self.assertEqual(status, '200 OK')
+        self.assertLess(seconds, FIRST_RESPONSE_BUDGET_SECONDS)
+        self.assertEqual(startup.eager_modules(modules), [])
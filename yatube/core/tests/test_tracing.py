@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import tracing
+from posts.models import Post, User
+
+TEMP_DIR = tempfile.mkdtemp()
+TRACING_FILE = os.path.join(TEMP_DIR, 'traces.jsonl')
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(TRACING_FILE=TRACING_FILE, TRACING_SAMPLE_RATE=1,
+                   MEDIA_ROOT=TEMP_DIR)
+class TracingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        if os.path.exists(TRACING_FILE):
+            os.remove(TRACING_FILE)
+
+    def traces(self):
+        if not os.path.exists(TRACING_FILE):
+            return []
+        with open(TRACING_FILE, encoding='utf-8') as traces:
+            return [json.loads(line) for line in traces]
+
+    def spans(self, trace):
+        return trace['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+    def test_spans_nest_under_request(self):
+        self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        [trace] = self.traces()
+        spans = self.spans(trace)
+        by_id = {span['spanId']: span for span in spans}
+
+        def ancestors(span):
+            names = []
+            while span['parentSpanId']:
+                span = by_id[span['parentSpanId']]
+                names.append(span['name'])
+            return names
+
+        def named(name):
+            return [span for span in spans if span['name'] == name]
+
+        [root] = [span for span in spans if not span['parentSpanId']]
+        self.assertEqual(root['kind'], tracing.SERVER)
+        self.assertEqual(root['name'], 'GET posts/<int:post_id>/')
+        self.assertEqual(len({span['traceId'] for span in spans}), 1)
+        for name in ('middleware.request', 'middleware.response',
+                     'view posts:post_detail'):
+            self.assertEqual(ancestors(named(name)[0]), [root['name']])
+        view = 'view posts:post_detail'
+        for name in ('render includes/comment.html', 'thumbnail', 'SELECT'):
+            with self.subTest(name=name):
+                self.assertIn(view, ancestors(named(name)[0]))
+        query = named('SELECT')[0]
+        self.assertEqual(query['kind'], tracing.CLIENT)
+        self.assertIn({'key': 'db.system', 'value': {'stringValue': 'sqlite'}},
+                      query['attributes'])
+        for span in spans:
+            self.assertLessEqual(int(span['startTimeUnixNano']),
+                                 int(span['endTimeUnixNano']))
+
+    def test_sample_rate_zero_writes_nothing(self):
+        with self.settings(TRACING_SAMPLE_RATE=0):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(self.traces(), [])
+
+    def test_traceparent_from_untrusted_client_is_ignored(self):
+        with self.settings(TRACING_SAMPLE_RATE=0):
+            self.client.get(reverse('posts:index'),
+                            HTTP_TRACEPARENT=f'00-{"a" * 32}-{"b" * 16}-01')
+        self.assertEqual(self.traces(), [])
+
+    def test_export_file_is_rotated(self):
+        with self.settings(TRACING_FILE_MAX_BYTES=1, TRACING_FILE_BACKUPS=1):
+            for _ in range(3):
+                self.client.get(reverse('about:author'))
+        self.assertEqual(len(self.traces()), 1)
+        self.assertTrue(os.path.exists(f'{TRACING_FILE}.1'))
+        self.assertFalse(os.path.exists(f'{TRACING_FILE}.2'))
+
+    @override_settings(TRACING_TRUSTED_IPS=('127.0.0.1',))
+    def test_traceparent_continues_trace(self):
+        trace_id, parent_id = 'a' * 32, 'b' * 16
+        with self.settings(TRACING_SAMPLE_RATE=0):
+            self.client.get(reverse('posts:index'),
+                            HTTP_TRACEPARENT=f'00-{trace_id}-{parent_id}-01')
+            self.client.get(reverse('posts:index'),
+                            HTTP_TRACEPARENT=f'00-{trace_id}-{parent_id}-00')
+        [trace] = self.traces()
+        spans = self.spans(trace)
+        self.assertTrue(all(span['traceId'] == trace_id for span in spans))
+        self.assertEqual(spans[0]['parentSpanId'], parent_id)
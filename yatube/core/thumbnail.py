@@ -0,0 +1,13 @@
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import tracing
+
+
+class TracingThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, выделяющий поиск миниатюры в спан трассы."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with tracing.span('thumbnail', **{
+                'thumbnail.source': str(file_),
+                'thumbnail.geometry': geometry_string}):
+            return super().get_thumbnail(file_, geometry_string, **options)
@@ -0,0 +1,215 @@
+import json
+import os
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Значения SpanKind из OpenTelemetry.
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+STATUS_ERROR = 2
+
+TRACEPARENT = re.compile(
+    r'^00-(?P<trace_id>[0-9a-f]{32})-(?P<parent_id>[0-9a-f]{16})'
+    r'-(?P<flags>[0-9a-f]{2})$')
+
+_current = ContextVar('trace', default=None)
+_write_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ('span_id', 'parent_id', 'name', 'kind', 'attributes',
+                 'start', 'end', 'error')
+
+    def __init__(self, name, kind, parent_id, attributes):
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    def as_otlp(self, trace_id):
+        data = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [{'key': key, 'value': otlp_value(value)}
+                           for key, value in self.attributes.items()],
+        }
+        if self.error is not None:
+            data['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return data
+
+
+class Trace:
+    """Спаны одного запроса; stack - открытые спаны, последний - текущий."""
+
+    def __init__(self, trace_id=None, parent_id=None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.parent_id = parent_id
+        self.spans = []
+        self.stack = []
+        self.phases = {}
+
+    def as_otlp(self):
+        """Запрос экспорта OTLP/JSON, как его пишет file exporter
+        OpenTelemetry Collector."""
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name',
+                 'value': otlp_value(settings.TRACING_SERVICE_NAME)},
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.as_otlp(self.trace_id)
+                          for span in self.spans],
+            }],
+        }]}
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def current():
+    return _current.get()
+
+
+def sample(request):
+    """Решает, трассировать ли запрос.
+
+    Возвращает (trace_id, parent_id) или None. Заголовок traceparent
+    (W3C Trace Context) продолжает чужую трассу и сам решает о выборке,
+    но только от адресов из TRACING_TRUSTED_IPS: иначе любой клиент мог
+    бы включить трассировку. Остальные запросы попадают в выборку с
+    вероятностью TRACING_SAMPLE_RATE.
+    """
+    match = None
+    if request.META.get('REMOTE_ADDR') in settings.TRACING_TRUSTED_IPS:
+        match = TRACEPARENT.match(request.META.get('HTTP_TRACEPARENT', ''))
+    if match:
+        if not int(match['flags'], 16) & 1:
+            return None
+        return match['trace_id'], match['parent_id']
+    rate = settings.TRACING_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return None, None
+    return None
+
+
+def start_trace(trace_id=None, parent_id=None):
+    trace = Trace(trace_id, parent_id)
+    return trace, _current.set(trace)
+
+
+def finish_trace(token):
+    trace = _current.get()
+    _current.reset(token)
+    for span in reversed(trace.stack):
+        end_span(span, trace=trace)
+    export(trace)
+
+
+def start_span(name, kind=INTERNAL, **attributes):
+    """Открывает вложенный в текущий спан; None, если запрос не
+    трассируется."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    parent_id = trace.stack[-1].span_id if trace.stack else trace.parent_id
+    span = Span(name, kind, parent_id, attributes)
+    trace.spans.append(span)
+    trace.stack.append(span)
+    return span
+
+
+def end_span(span, error=None, trace=None):
+    """Закрывает спан и все незакрытые вложенные в него."""
+    if span is None or span.end is not None:
+        return
+    trace = trace or _current.get()
+    now = time.time_ns()
+    if span in trace.stack:
+        while trace.stack[-1] is not span:
+            trace.stack.pop().end = now
+        trace.stack.pop()
+    span.end = now
+    if error is not None:
+        span.error = f'{type(error).__name__}: {error}'
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    opened = start_span(name, kind, **attributes)
+    try:
+        yield opened
+    except Exception as error:
+        end_span(opened, error)
+        raise
+    end_span(opened)
+
+
+def trace_query(execute, sql, params, many, context):
+    """execute_wrapper, оборачивающий каждый SQL-запрос в спан."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    attributes = {'db.system': context['connection'].vendor,
+                  'db.statement': sql}
+    with span(sql.split(None, 1)[0].upper(), CLIENT, **attributes):
+        return execute(sql, params, many, context)
+
+
+def rotate(path):
+    """Сдвигает path -> path.1 -> ... -> path.<TRACING_FILE_BACKUPS>,
+    самый старый файл удаляется."""
+    backups = settings.TRACING_FILE_BACKUPS
+    if backups:
+        for number in range(backups - 1, 0, -1):
+            if os.path.exists(f'{path}.{number}'):
+                os.replace(f'{path}.{number}', f'{path}.{number + 1}')
+        os.replace(path, f'{path}.1')
+    else:
+        os.remove(path)
+
+
+def export(trace):
+    """Дописывает трассу строкой JSON в TRACING_FILE.
+
+    Файл больше TRACING_FILE_MAX_BYTES уходит в ротацию, так что трассы
+    занимают на диске не больше (TRACING_FILE_BACKUPS + 1) таких файлов.
+    """
+    path = settings.TRACING_FILE
+    line = json.dumps(trace.as_otlp(), ensure_ascii=False) + '\n'
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _write_lock:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if size and size + len(line) > settings.TRACING_FILE_MAX_BYTES:
+            rotate(path)
+        with open(path, 'a', encoding='utf-8') as output:
+            output.write(line)
@@ -1,5 +1,14 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from core import metrics as core_metrics
+from core import profiler
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +24,34 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    if not core_metrics.can_read(request):
+        raise PermissionDenied
+    return HttpResponse(
+        core_metrics.render_prometheus(core_metrics.registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def profiles(request):
+    context = {
+        'captures': profiler.recent_captures(),
+        'tokens': {mode: profiler.make_token(request.user, mode)
+                   for mode in profiler.MODES},
+        'param': profiler.PARAM,
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_capture(request, directory, filename):
+    if directory.startswith('.') or filename.startswith('.'):
+        raise Http404
+    path = os.path.join(settings.PROFILER_DIR, directory, filename)
+    if not os.path.isfile(path):
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True,
+                        filename=filename)
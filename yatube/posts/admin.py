@@ -1,33 +1,189 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from core.jobs import recent_jobs, start_job
+from core.paginator import EstimatedCountPaginator
+from . import bulk
+from .cache import group_choices
 from .models import Comment, Group, Post, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class PostChangeListForm(forms.ModelForm):
+    """Строка списка постов: группы выбираются из общего кеша, а не
+    отдельным запросом на каждую строку."""
+    group = forms.ModelChoiceField(Group.objects.all(), required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields['group']
+        field.choices = [('', field.empty_label)] + group_choices()
+
+
+class GroupListFilter(admin.RelatedFieldListFilter):
+    """Фильтр по группе из общего кеша: действие над выборкой строит
+    фильтры списка повторно."""
+
+    def field_choices(self, field, request, model_admin):
+        return group_choices()
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(Group.objects.all(), required=False,
+                                   label='Группа', empty_label='Без группы')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields['group']
+        field.choices = [('', field.empty_label)] + group_choices()
+
+
+class FastChangeListMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class BulkActionsMixin:
+    """Массовые действия, работающие пачками по первичному ключу.
+
+    Объекты не загружаются в память целиком, а большие выборки
+    обрабатываются в фоне; ход выполнения виден на странице задач.
+    """
+    actions = ('delete_chunked',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def confirm_action(self, request, queryset, action, title, form=None):
+        context = {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'opts': self.model._meta,
+            'form': form,
+            'count': queryset.count(),
+            'action': action,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        }
+        return TemplateResponse(
+            request, 'admin/posts/confirm_action.html', context)
+
+    def run_bulk(self, request, name, func, total):
+        job = start_job(name, func, total)
+        if job['status'] == 'running':
+            self.message_user(request, format_html(
+                '«{}» выполняется в фоне: <a href="{}">ход выполнения</a>.',
+                name, reverse('admin:posts_jobs')))
+        else:
+            self.message_user(
+                request, f'«{name}»: обработано объектов: {job["done"]}.')
+
+    def bulk_delete(self, queryset, progress):
+        return bulk.delete_in_chunks(queryset, progress)
+
+    def delete_chunked(self, request, queryset):
+        if 'apply' not in request.POST:
+            return self.confirm_action(
+                request, queryset, 'delete_chunked',
+                f'Удалить: {self.model._meta.verbose_name_plural}')
+        self.run_bulk(
+            request, f'Удаление: {self.model._meta.verbose_name_plural}',
+            lambda progress: self.bulk_delete(queryset, progress),
+            queryset.count())
+    delete_chunked.short_description = 'Удалить выбранные'
+    delete_chunked.allowed_permissions = ('delete',)
+
+
+class PostAdmin(BulkActionsMixin, FastChangeListMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_display_links = ('text', 'author')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date', 'group')
+    list_filter = ('pub_date', ('group', GroupListFilter))
     list_editable = ('group',)
+    autocomplete_fields = ('author', 'group')
     empty_value_display = '-пусто-'
 
+    actions = ('move_to_group', 'delete_chunked')
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_urls(self):
+        jobs = path('jobs/', self.admin_site.admin_view(self.jobs_view),
+                    name='posts_jobs')
+        return [jobs] + super().get_urls()
+
+    def jobs_view(self, request):
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Массовые операции',
+            'jobs': recent_jobs(),
+        }
+        return TemplateResponse(request, 'admin/jobs.html', context)
+
+    def bulk_delete(self, queryset, progress):
+        return bulk.delete_posts(queryset, progress)
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(
+            request.POST if 'apply' in request.POST else None)
+        if not form.is_valid():
+            return self.confirm_action(request, queryset, 'move_to_group',
+                                       'Перенести статьи в группу', form)
+        group = form.cleaned_data['group']
+        self.run_bulk(
+            request, f'Перенос статей в группу «{group or "без группы"}»',
+            lambda progress: bulk.move_posts(queryset, group, progress),
+            queryset.count())
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
     list_editable = ('slug',)
     list_display_links = ('title',)
+    search_fields = ('title', 'slug')
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(BulkActionsMixin, FastChangeListMixin, admin.ModelAdmin):
     list_display = ('post', 'text', 'author', 'created')
+    list_select_related = ('post', 'author')
     list_filter = ('created',)
     search_fields = ('text',)
+    autocomplete_fields = ('post', 'author')
+    actions = ('delete_chunked', 'purge_by_author')
+
+    def purge_by_author(self, request, queryset):
+        authors = list(queryset.order_by()
+                       .values_list('author_id', flat=True).distinct())
+        comments = Comment.objects.filter(author_id__in=authors)
+        if 'apply' not in request.POST:
+            return self.confirm_action(
+                request, comments, 'purge_by_author',
+                f'Удалить все комментарии авторов: {len(authors)}')
+        self.run_bulk(
+            request, 'Удаление комментариев авторов',
+            lambda progress: bulk.delete_in_chunks(comments, progress),
+            comments.count())
+    purge_by_author.short_description = 'Удалить все комментарии авторов'
+    purge_by_author.allowed_permissions = ('delete',)
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'author',)
-    search_fields = ('user', 'author',)
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username',)
+    autocomplete_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
     verbose_name = 'Статьи'
+
+    def ready(self):
+        from posts.cache import invalidate_group_choices
+        from posts.models import Group
+
+        post_save.connect(invalidate_group_choices, sender=Group)
+        post_delete.connect(invalidate_group_choices, sender=Group)
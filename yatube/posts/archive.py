@@ -0,0 +1,67 @@
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = ('id', 'text', 'text_html', 'preview', 'truncated',
+               'text_version', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+class ChainedPosts:
+    """Горячие посты, а за ними архивные - как один список для Paginator.
+
+    Оба queryset'а должны быть отсортированы по убыванию даты, тогда
+    архивные посты (они всегда старше) продолжают горячие.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+        self._hot_count = None
+
+    @property
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        result = []
+        if start < self.hot_count:
+            result += list(self.hot[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            result += list(self.archived[
+                max(start - self.hot_count, 0):stop - self.hot_count])
+        return result
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит в архив одну пачку постов старше cutoff вместе с
+    комментариями и возвращает число перенесённых постов.
+
+    Вызывается внутри транзакции, см. команду archive_posts.
+    """
+    posts = list(Post.objects
+                 .filter(pub_date__lt=cutoff)
+                 .order_by('pk')
+                 .values(*POST_FIELDS)[:batch_size])
+    if not posts:
+        return 0
+    ids = [post['id'] for post in posts]
+    comments = Comment.objects.filter(post_id__in=ids)
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**post) for post in posts)
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(**comment)
+        for comment in comments.values(*COMMENT_FIELDS))
+    comments.delete()
+    Post.objects.filter(pk__in=ids).delete()
+    return len(posts)
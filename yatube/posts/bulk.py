@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+from sorl import thumbnail
+
+from core.db import atomic_write
+from posts.cache import bump_feed_version
+
+
+def pk_chunks(queryset, size=None):
+    """Первичные ключи выборки пачками по size в порядке возрастания.
+
+    Каждая пачка - отдельный запрос с условием pk > последнего, поэтому
+    выборка не загружается целиком и не сбивается от изменений в уже
+    обработанных строках.
+    """
+    size = size or settings.BULK_CHUNK_SIZE
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        chunk = pks if last is None else pks.filter(pk__gt=last)
+        chunk = list(chunk[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def update_in_chunks(queryset, progress=None, size=None, **values):
+    """UPDATE выборки пачками, каждая - в своей короткой транзакции."""
+    manager = queryset.model._default_manager
+    updated = 0
+    for chunk in pk_chunks(queryset, size):
+        updated += atomic_write(manager.filter(pk__in=chunk).update, **values)
+        if progress:
+            progress(len(chunk))
+    return updated
+
+
+def delete_rows(model, pks, using=DEFAULT_DB_ALIAS):
+    """DELETE строк model с первичными ключами pks и зависимых строк.
+
+    Зависимые по CASCADE строки удаляются, по SET_NULL - отвязываются,
+    запросами по внешнему ключу. Объекты не загружаются, сигналы
+    удаления не отправляются. Возвращает число удалённых строк.
+    """
+    deleted = 0
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': pks})
+        if relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+        elif relation.on_delete is not models.CASCADE:
+            raise ValueError(f'{relation}: поддерживаются только CASCADE '
+                             f'и SET_NULL')
+        elif relation.related_model._meta.related_objects:
+            deleted += delete_rows(
+                relation.related_model,
+                list(related.values_list('pk', flat=True)), using)
+        else:
+            deleted += related._raw_delete(using)
+    rows = model._base_manager.using(using).filter(pk__in=pks)
+    return deleted + rows._raw_delete(using)
+
+
+def delete_in_chunks(queryset, progress=None, size=None):
+    """DELETE выборки пачками вместе с зависимыми строками."""
+    deleted = 0
+    for chunk in pk_chunks(queryset, size):
+        deleted += atomic_write(delete_rows, queryset.model, chunk)
+        if progress:
+            progress(len(chunk))
+    return deleted
+
+
+def delete_with_images(queryset, progress=None, size=None):
+    """Как delete_in_chunks, но ещё удаляет файлы картинок и миниатюры.
+
+    Файлы удаляются после коммита пачки, чтобы откат не оставил строки
+    без картинок.
+    """
+    manager = queryset.model._default_manager
+    deleted = 0
+    for chunk in pk_chunks(queryset, size):
+        images = [name for name in manager.filter(pk__in=chunk)
+                  .values_list('image', flat=True) if name]
+        deleted += atomic_write(delete_rows, queryset.model, chunk)
+        for name in images:
+            thumbnail.delete(name)
+        if progress:
+            progress(len(chunk))
+    return deleted
+
+
+def move_posts(queryset, group, progress=None):
+    moved = update_in_chunks(queryset, progress, group=group)
+    bump_feed_version()
+    return moved
+
+
+def delete_posts(queryset, progress=None, size=None):
+    deleted = delete_with_images(queryset, progress, size)
+    bump_feed_version()
+    return deleted
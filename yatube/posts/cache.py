@@ -0,0 +1,38 @@
+from django.core.cache import cache
+
+from posts.models import Group
+
+GROUP_CHOICES_KEY = 'posts:group_choices'
+
+
+def group_choices():
+    """Список (pk, название) всех групп, общий для всех форм и запросов."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = [(group.pk, str(group))
+                   for group in Group.objects.order_by('title')]
+        cache.set(GROUP_CHOICES_KEY, choices, None)
+    return choices
+
+
+def invalidate_group_choices(**kwargs):
+    cache.delete(GROUP_CHOICES_KEY)
+
+
+FEED_VERSION_KEY = 'posts:feed_version'
+
+
+def feed_version():
+    """Версия ленты: входит в ключ кеша фрагментов index.
+
+    Меняется только массовыми операциями, обычное сохранение поста
+    по-прежнему ждёт истечения кеша.
+    """
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def bump_feed_version():
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 2, None)
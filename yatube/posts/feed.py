@@ -0,0 +1,105 @@
+from django.conf import settings
+
+# Ровно те столбцы, что читает includes/post_item.html.
+FEED_COLUMNS = (
+    'pk', 'pub_date', 'image', 'preview', 'truncated', 'text_version',
+    'author_id', 'author__username',
+    'group_id', 'group__slug', 'group__title',
+)
+
+
+class FeedAuthor:
+    __slots__ = ('pk', 'username')
+
+    def __init__(self, pk, username):
+        self.pk = pk
+        self.username = username
+
+    def __str__(self):
+        return self.username
+
+
+class FeedGroup:
+    __slots__ = ('pk', 'slug', 'title')
+
+    def __init__(self, pk, slug, title):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class FeedPost:
+    """Строка ленты с теми же атрибутами, что нужны карточке от Post.
+
+    text заполняется только у строк без построенного отрывка.
+    """
+    __slots__ = ('pk', 'pub_date', 'image', 'preview', 'truncated',
+                 'text_version', 'text', 'author', 'group')
+
+    def __init__(self, pk, pub_date, image, preview, truncated,
+                 text_version, author, group):
+        self.pk = pk
+        self.pub_date = pub_date
+        self.image = image
+        self.preview = preview
+        self.truncated = truncated
+        self.text_version = text_version
+        self.text = ''
+        self.author = author
+        self.group = group
+
+    @property
+    def id(self):
+        return self.pk
+
+
+class FeedRows:
+    """Выборка постов, отдающая Paginator'у FeedPost вместо моделей.
+
+    Авторы и группы на странице создаются по одному разу на pk.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        authors, groups = {}, {}
+        rows = []
+        for (pk, pub_date, image, preview, truncated, text_version,
+             author_id, username, group_id, slug, title) in (
+                self.queryset.values_list(*FEED_COLUMNS)[key]):
+            author = authors.get(author_id)
+            if author is None:
+                author = authors[author_id] = FeedAuthor(author_id, username)
+            group = None
+            if group_id is not None:
+                group = groups.get(group_id)
+                if group is None:
+                    group = groups[group_id] = FeedGroup(group_id, slug,
+                                                         title)
+            rows.append(FeedPost(pk, pub_date, image, preview, truncated,
+                                 text_version, author, group))
+        unrendered = {row.pk: row for row in rows if not row.text_version}
+        if unrendered:
+            for pk, text in self.queryset.model._default_manager.filter(
+                    pk__in=unrendered).values_list('pk', 'text'):
+                unrendered[pk].text = text
+        return rows
+
+
+def feed(queryset):
+    """Выборка для ленты: FeedRows, если включён FEED_ROWS, иначе как есть."""
+    if settings.FEED_ROWS:
+        return FeedRows(queryset)
+    return queryset
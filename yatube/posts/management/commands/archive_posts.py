@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.db import atomic_write
+from posts.archive import archive_batch
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше --older-than-days вместе с комментариями '
+            'в архивные таблицы. Каждая пачка - отдельная короткая '
+            'транзакция, чтобы не держать блокировку базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Освободить место в файле базы после '
+                                 'переноса.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        total = 0
+        while True:
+            moved = atomic_write(archive_batch, cutoff,
+                                 options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f'Перенесено постов: {total}')
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+        self.stdout.write(self.style.SUCCESS(
+            f'Архивировано постов: {total}, граница: {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import override_settings
+
+from core import bench
+from posts.feed import FeedRows
+from posts.models import Post
+from posts.views import FULL_TEXT_FIELDS, page_look
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает построение и отрисовку страницы ленты из моделей '
+            'Post и из лёгких строк FeedRows: время и выделенная память '
+            'на страницу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with bench.temporary_database(), override_settings(
+                DEBUG=False, QUERYCHECK_ENABLED=False):
+            call_command('seed_scale', users=options['users'],
+                         posts=options['posts'], comments_per_post=0,
+                         follows_per_user=0, seed=options['seed'],
+                         stdout=self.stderr)
+            for label, make_list in (('models', self.models),
+                                     ('rows', self.rows)):
+                summary = self.measure(make_list, options['iterations'])
+                self.stdout.write(
+                    f'{label:8} p50 {summary["p50_ms"]:7.3f} ms  '
+                    f'p95 {summary["p95_ms"]:7.3f} ms  '
+                    f'{summary["alloc_kib"]:8.1f} KiB  '
+                    f'{summary["blocks"]:6} блоков на страницу')
+
+    def models(self):
+        return (Post.objects.select_related('author', 'group')
+                .defer(*FULL_TEXT_FIELDS))
+
+    def rows(self):
+        return FeedRows(self.models())
+
+    def measure(self, make_list, iterations):
+        """make_list отдаёт новую выборку, чтобы не читать кеш queryset."""
+        template = get_template('includes/post_item.html')
+        pages = make_list().count() // settings.VIEW_COUNT or 1
+        timings = []
+        for iteration in range(iterations):
+            start = time.perf_counter()
+            page = page_look(make_list(), iteration % pages + 1)
+            for post in page:
+                template.render({'post': post})
+            timings.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            page = list(page_look(make_list(), 2))
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        stats = after.compare_to(before, 'filename')
+        del page
+        return {
+            'p50_ms': bench.percentile(timings, 50),
+            'p95_ms': bench.percentile(timings, 95),
+            'alloc_kib': sum(stat.size_diff for stat in stats) / 1024,
+            'blocks': sum(stat.count_diff for stat in stats),
+        }
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.rendering import RENDERER_VERSION, rerender
+
+
+class Command(BaseCommand):
+    help = ('Обновляет сохранённый HTML текста постов, отрисованный '
+            'устаревшей версией рендерера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true',
+                            help='Перерисовать все посты, а не только '
+                                 'устаревшие.')
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.exclude(text_version=RENDERER_VERSION)
+            total = rerender(queryset, options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обновлено {total}')
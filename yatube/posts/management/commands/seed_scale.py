@@ -0,0 +1,184 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SENTENCE_POOL_SIZE = 2000
+ZIPF_EXPONENT = 1.1
+
+
+def zipf_weights(count):
+    """Веса, при которых первые элементы выбираются много чаще прочих."""
+    return list(itertools.accumulate(
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1)))
+
+
+@contextmanager
+def manual_dates(*fields):
+    """Отключает auto_now_add, чтобы задать даты вручную."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными в масштабе продакшена: '
+            'популярность авторов и групп распределена по степенному '
+            'закону, результат воспроизводится по --seed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--comments-per-post', type=int, default=3)
+        parser.add_argument('--days', type=int, default=3 * 365,
+                            help='За сколько дней распределить посты.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = f'seed{options["seed"]}_'
+        self.slug_prefix = f'seed{options["seed"]}-'
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже загружены.')
+        self.sentences = [self.fake.sentence(nb_words=12)
+                          for _ in range(SENTENCE_POOL_SIZE)]
+        self.now = timezone.now()
+
+        user_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        with manual_dates(Post._meta.get_field('pub_date'),
+                          Comment._meta.get_field('created')):
+            posts = self.create_posts(user_ids, group_ids,
+                                      options['posts'], options['days'])
+            comments = self.create_comments(
+                user_ids, posts, options['comments_per_post'])
+        follows = self.create_follows(user_ids,
+                                      options['follows_per_user'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(user_ids)}, групп '
+            f'{len(group_ids)}, постов {len(posts)}, комментариев '
+            f'{comments}, подписок {follows}.'))
+
+    def text(self, min_sentences, max_sentences):
+        count = self.rng.randint(min_sentences, max_sentences)
+        return ' '.join(self.rng.choice(self.sentences)
+                        for _ in range(count))
+
+    def bulk_create(self, model, objects):
+        for batch in iter(lambda: list(
+                itertools.islice(objects, self.batch_size)), []):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def create_users(self, count):
+        password = make_password(None)
+        users = (
+            User(username=f'{self.prefix}{self.fake.user_name()}_{number}',
+                 first_name=self.fake.first_name(),
+                 last_name=self.fake.last_name(),
+                 password=password)
+            for number in range(count)
+        )
+        self.bulk_create(User, users)
+        # Порядок id совпадает с порядком популярности из zipf_weights.
+        return list(User.objects.filter(username__startswith=self.prefix)
+                    .order_by('pk').values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        groups = (
+            Group(title=self.fake.catch_phrase()[:200],
+                  slug=f'{self.slug_prefix}group-{number}',
+                  description=self.text(1, 3))
+            for number in range(count)
+        )
+        self.bulk_create(Group, groups)
+        return list(Group.objects.filter(slug__startswith=self.slug_prefix)
+                    .order_by('pk').values_list('pk', flat=True))
+
+    def create_posts(self, user_ids, group_ids, count, days):
+        author_weights = zipf_weights(len(user_ids))
+        group_weights = zipf_weights(len(group_ids))
+        first_new_pk = (Post.objects.order_by('-pk')
+                        .values_list('pk', flat=True).first() or 0) + 1
+        dates = sorted(
+            self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+            for _ in range(count)
+        )
+
+        def posts():
+            for pub_date in dates:
+                group_id = None
+                if group_ids and self.rng.random() < 0.7:
+                    group_id = self.rng.choices(
+                        group_ids, cum_weights=group_weights)[0]
+                yield Post(
+                    author_id=self.rng.choices(
+                        user_ids, cum_weights=author_weights)[0],
+                    group_id=group_id,
+                    text=self.text(1, 20),
+                    pub_date=pub_date,
+                )
+
+        self.bulk_create(Post, posts())
+        return list(Post.objects.filter(pk__gte=first_new_pk)
+                    .order_by('pk').values_list('pk', 'pub_date'))
+
+    def create_comments(self, user_ids, posts, per_post):
+        created = 0
+
+        def comments():
+            nonlocal created
+            for post_id, pub_date in posts:
+                age = (self.now - pub_date).total_seconds()
+                number = 0
+                if per_post:
+                    number = round(self.rng.expovariate(1 / per_post))
+                created += number
+                for _ in range(number):
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.rng.choice(user_ids),
+                        text=self.text(1, 3),
+                        created=pub_date + timedelta(
+                            seconds=self.rng.uniform(0, age)),
+                    )
+
+        self.bulk_create(Comment, comments())
+        return created
+
+    def create_follows(self, user_ids, per_user):
+        weights = zipf_weights(len(user_ids))
+        pairs = set()
+        for user_id in user_ids:
+            for author_id in self.rng.choices(
+                    user_ids, cum_weights=weights,
+                    k=min(per_user, len(user_ids) - 1)):
+                if author_id != user_id:
+                    pairs.add((user_id, author_id))
+        self.bulk_create(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in sorted(pairs)
+        ))
+        return len(pairs)
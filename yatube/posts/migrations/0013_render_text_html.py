@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+BATCH_SIZE = 500
+
+
+def render_text(text):
+    """Копия posts.rendering.render_text версии 1: миграция не должна
+    меняться вместе с текущим кодом."""
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def render_existing_posts(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        posts = model.objects.order_by('pk').only('pk', 'text')
+        last = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last)[:BATCH_SIZE])
+            if not batch:
+                break
+            for post in batch:
+                post.text_html = render_text(post.text)
+                post.text_version = 1
+            model.objects.bulk_update(batch, ('text_html', 'text_version'))
+            last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_text_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_existing_posts,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:15
+
+from django.db import migrations, models
+from django.utils.html import escape
+from django.utils.text import Truncator, normalize_newlines
+
+BATCH_SIZE = 500
+
+# PREVIEW_LENGTH на момент миграции.
+PREVIEW_LENGTH = 300
+
+
+def render_text(text):
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def render_preview(text):
+    """Копия posts.rendering.render_preview версии 2: миграция не должна
+    меняться вместе с текущим кодом и настройками."""
+    truncated = len(text) > PREVIEW_LENGTH
+    if truncated:
+        text = Truncator(text).chars(PREVIEW_LENGTH)
+    return render_text(text), truncated
+
+
+def render_previews(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        posts = model.objects.order_by('pk').only('pk', 'text')
+        last = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last)[:BATCH_SIZE])
+            if not batch:
+                break
+            for post in batch:
+                post.preview, post.truncated = render_preview(post.text)
+                post.text_version = 2
+            model.objects.bulk_update(
+                batch, ('preview', 'truncated', 'text_version'))
+            last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_render_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='preview',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='truncated',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='preview',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML отрывка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Отрывок короче текста'),
+        ),
+        migrations.RunPython(render_previews, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,48 @@
 from django.contrib.auth.models import User
 from django.db import models
 
+from .rendering import RENDERED_FIELDS, rendered_fields, rerender
+
+
+class PostQuerySet(models.QuerySet):
+    """Пути мимо save(), меняющие текст, тоже обновляют сохранённый HTML.
+
+    Сырой SQL по-прежнему оставляет HTML устаревшим; после него нужен
+    rerender_posts --all.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.render_text()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'text' in fields:
+            for obj in objs:
+                obj.render_text()
+            fields = {*fields, *RENDERED_FIELDS}
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if 'text' not in kwargs:
+            return super().update(**kwargs)
+        # Текст может быть выражением (F, Concat), поэтому HTML
+        # перерисовывается по уже записанному тексту.
+        ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        rerender(self.model._default_manager.filter(pk__in=ids))
+        return rows
+
+    update.alters_data = True
+
 
 class Post(models.Model):
     FIRST_FIFTEEN_CHARACTERS = 15
     text = models.TextField(verbose_name='Текст статьи',
                             help_text='Введите текст статьи')
     pub_date = models.DateTimeField(auto_now_add=True,
+                                    db_index=True,
                                     verbose_name='Дата публикации',
                                     help_text='Укажите дату '
                                               'публикации')
@@ -21,18 +57,47 @@ class Post(models.Model):
                               help_text='Выберите тематическую группу '
                                         'в выпадающем списке по желанию')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    text_html = models.TextField(blank=True, editable=False,
+                                 verbose_name='HTML текста')
+    preview = models.TextField(blank=True, editable=False,
+                               verbose_name='HTML отрывка')
+    truncated = models.BooleanField(default=False, editable=False,
+                                    verbose_name='Отрывок короче текста')
+    text_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия HTML текста')
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Статья'
         verbose_name_plural = 'Статьи'
         ordering = ('-pub_date',)
+        # Ленты автора и группы сортируются по индексу, без temp b-tree.
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:Post.FIRST_FIFTEEN_CHARACTERS]
 
+    def render_text(self):
+        for name, value in rendered_fields(self.text).items():
+            setattr(self, name, value)
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
-    title = models.CharField(max_length=200, verbose_name='Название группы',
+    title = models.CharField(max_length=200, db_index=True,
+                             verbose_name='Название группы',
                              help_text='Введите название тематической группы')
     slug = models.SlugField(unique=True, verbose_name='Номер группы',
                             help_text='Укажите порядковый номер группы')
@@ -94,3 +159,64 @@ class Follow(models.Model):
                 fields=['author', 'user'], name='unique_following'
             )
         ]
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    Первичный ключ совпадает с id исходного поста.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст статьи')
+    pub_date = models.DateTimeField(db_index=True,
+                                    verbose_name='Дата публикации')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='archived_posts',
+                               verbose_name='Автор статьи')
+    group = models.ForeignKey(Group, blank=True, null=True,
+                              on_delete=models.SET_NULL,
+                              related_name='archived_posts',
+                              verbose_name='Группа статей')
+    image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    text_html = models.TextField(blank=True, editable=False)
+    preview = models.TextField(blank=True, editable=False)
+    truncated = models.BooleanField(default=False, editable=False)
+    text_version = models.PositiveSmallIntegerField(default=0,
+                                                    editable=False)
+    archived = models.DateTimeField(auto_now_add=True,
+                                    verbose_name='Дата архивации')
+
+    class Meta:
+        verbose_name = 'Архивная статья'
+        verbose_name_plural = 'Архивные статьи'
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='archived_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='archived_group_pub_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.text[:Post.FIRST_FIFTEEN_CHARACTERS]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Комментарии'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор публикации'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата комментария')
+
+    def __str__(self):
+        return self.text[:30]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# Увеличивается при любом изменении вывода render_text и render_preview,
+# чтобы rerender_posts обновил сохранённый HTML.
+RENDERER_VERSION = 2
+
+RENDERED_FIELDS = ('text_html', 'preview', 'truncated', 'text_version')
+
+
+def render_text(text):
+    """HTML тела поста: экранированный текст с <br> вместо переносов."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def render_preview(text):
+    """HTML отрывка для карточки поста и признак того, что текст обрезан."""
+    truncated = len(text) > settings.PREVIEW_LENGTH
+    if truncated:
+        text = Truncator(text).chars(settings.PREVIEW_LENGTH)
+    return render_text(text), truncated
+
+
+def rendered_fields(text):
+    """Значения всех полей поста, вычисляемых из его текста."""
+    preview, truncated = render_preview(text)
+    return {
+        'text_html': render_text(text),
+        'preview': preview,
+        'truncated': truncated,
+        'text_version': RENDERER_VERSION,
+    }
+
+
+def rerender(queryset, batch_size=500):
+    """Сохраняет свежие RENDERED_FIELDS для выборки постов пачками.
+
+    Возвращает число обработанных постов.
+    """
+    posts = queryset.order_by('pk').only('pk', 'text')
+    last, total = None, 0
+    while True:
+        batch = posts if last is None else posts.filter(pk__gt=last)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return total
+        for post in batch:
+            for name, value in rendered_fields(post.text).items():
+                setattr(post, name, value)
+        queryset.model._default_manager.bulk_update(batch, RENDERED_FIELDS)
+        last = batch[-1].pk
+        total += len(batch)
@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.jobs import recent_jobs
+from core.paginator import EstimatedCountPaginator
+from .. import bulk
+from ..cache import feed_version, group_choices
+from ..models import Comment, Group, Post, User
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.groups = [Group.objects.create(title=f'Группа {i}',
+                                           slug=f'group-{i}')
+                      for i in range(5)]
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, posts):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author,
+                 group=self.groups[i % len(self.groups)])
+            for i in range(posts))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        Post.objects.all().delete()
+        return len(context)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.changelist_queries(1)
+        self.assertEqual(self.changelist_queries(2),
+                         self.changelist_queries(40))
+
+    def test_group_choices_are_invalidated(self):
+        self.assertEqual(len(group_choices()), 5)
+        Group.objects.create(title='Новая', slug='new')
+        self.assertEqual(len(group_choices()), 6)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=5)
+    def test_paginator_estimates_only_unfiltered_counts(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(8))
+        posts = Post.objects.order_by('pk')
+        Post.objects.filter(pk=posts.last().pk).delete()
+        Post.objects.filter(pk=posts[3].pk).delete()
+        self.assertEqual(EstimatedCountPaginator(
+            Post.objects.filter(text__in=['Пост 1', 'Пост 2']), 10).count, 2)
+        searched = Post.objects.filter(text__startswith='Пост')
+        self.assertGreater(searched.count(), 5)
+        self.assertEqual(EstimatedCountPaginator(searched, 10).count,
+                         searched.count())
+        self.assertEqual(
+            EstimatedCountPaginator(Post.objects.all(), 10).count,
+            posts.last().pk - posts.first().pk + 1)
+
+
+class BulkActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.spammer) for i in range(10))
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def run_action(self, model, action, data=None):
+        url = reverse(f'admin:posts_{model}_changelist')
+        payload = {'action': action, 'index': 0, 'select_across': 1,
+                   '_selected_action': ['1'], **(data or {})}
+        confirm = self.client.post(url, payload)
+        self.assertEqual(confirm.status_code, 200)
+        self.assertTemplateUsed(confirm, 'admin/posts/confirm_action.html')
+        return self.client.post(url, {**payload, 'apply': 'Подтвердить'})
+
+    def test_move_to_group(self):
+        version = feed_version()
+        response = self.run_action('post', 'move_to_group',
+                                   {'group': self.group.pk})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.group.posts.count(), 10)
+        self.assertNotEqual(feed_version(), version)
+
+    def test_delete_in_chunks(self):
+        Comment.objects.create(post=Post.objects.first(),
+                               author=self.spammer, text='Спам')
+        self.run_action('post', 'delete_chunked')
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        job = recent_jobs()[0]
+        self.assertEqual((job['status'], job['done']), ('done', 10))
+
+    def test_delete_posts_does_not_load_rows(self):
+        Comment.objects.create(post=Post.objects.first(),
+                               author=self.spammer, text='Спам')
+        with CaptureQueriesContext(connection) as context:
+            deleted = bulk.delete_posts(Post.objects.all(), size=4)
+        self.assertEqual(deleted, 11)
+        self.assertFalse(Comment.objects.exists())
+        loaded = [query['sql'] for query in context.captured_queries
+                  if '"text"' in query['sql']]
+        self.assertEqual(loaded, [])
+
+    def test_purge_comments_by_author(self):
+        post = Post.objects.first()
+        other = User.objects.create_user(username='other')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.spammer, text=f'Спам {i}')
+            for i in range(7))
+        spam = Comment.objects.filter(author=self.spammer).first()
+        Comment.objects.create(post=post, author=other, text='Нормальный')
+        url = reverse('admin:posts_comment_changelist')
+        payload = {'action': 'purge_by_author', 'index': 0,
+                   'select_across': 0, '_selected_action': [spam.pk]}
+        self.client.post(url, {**payload, 'apply': 'Подтвердить'})
+        self.assertEqual(list(Comment.objects.values_list('text', flat=True)),
+                         ['Нормальный'])
+
+    def test_large_selection_runs_in_background(self):
+        with self.settings(BACKGROUND_JOB_THRESHOLD=5), \
+                mock.patch('core.jobs.threading.Thread') as thread:
+            response = self.run_action('post', 'delete_chunked')
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(Post.objects.count(), 10)
+        self.assertEqual(recent_jobs()[0]['status'], 'running')
+        jobs_page = self.client.get(reverse('admin:posts_jobs'))
+        self.assertContains(jobs_page, '0 из 10')
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import ChainedPosts
+from ..models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                      Post, User)
+
+SEED_OPTIONS = {
+    'users': 30,
+    'posts': 200,
+    'groups': 5,
+    'follows_per_user': 4,
+    'comments_per_post': 2,
+    'seed': 7,
+    'batch_size': 50,
+}
+
+
+class SeedScaleCommandTests(TestCase):
+    def seed(self):
+        call_command('seed_scale', stdout=StringIO(), **SEED_OPTIONS)
+        return list(Post.objects.order_by('pk').values_list(
+            'author__username', 'group__slug', 'text', 'pub_date__date'))
+
+    def test_creates_requested_amount_of_data(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertTrue(Comment.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+
+    def test_popularity_is_skewed(self):
+        self.seed()
+        top_author = User.objects.order_by('pk').first()
+        self.assertGreater(top_author.posts.count(), 200 / 30 * 2)
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed()
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+
+    def test_seed_cannot_be_loaded_twice(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class ArchivePostsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        old = timezone.now() - timedelta(days=400)
+        cls.old_posts = [
+            Post.objects.create(text=f'Старый пост {i}', author=cls.user,
+                                group=cls.group)
+            for i in range(3)
+        ]
+        Post.objects.filter(pk__in=[p.pk for p in cls.old_posts]).update(
+            pub_date=old)
+        cls.comment = Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Комментарий')
+        cls.new_post = Post.objects.create(text='Новый пост',
+                                           author=cls.user)
+
+    def archive(self):
+        call_command('archive_posts', older_than_days=365, batch_size=2,
+                     stdout=StringIO())
+
+    def test_moves_old_posts_and_comments(self):
+        self.archive()
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old_posts})
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedComment.objects.get()
+        self.assertEqual(archived.pk, self.comment.pk)
+        self.assertEqual(archived.post_id, self.old_posts[0].pk)
+
+    def test_chained_posts_slices(self):
+        self.archive()
+        chained = ChainedPosts(self.user.posts.all(),
+                               self.user.archived_posts.all())
+        archived = list(self.user.archived_posts.all())
+        self.assertEqual(len(chained), 4)
+        self.assertEqual(chained[0], self.new_post)
+        self.assertEqual(chained[1:], archived)
+        self.assertEqual(chained[:], [self.new_post, *archived])
+        self.assertEqual(chained[2:3], archived[1:2])
+
+    def test_post_detail_falls_back_to_archive(self):
+        self.archive()
+        post = self.old_posts[0]
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(response.context['posts_count'], 4)
+        self.assertEqual([c.text for c in response.context['comments']],
+                         ['Комментарий'])
+
+    def test_profile_pages_continue_into_archive(self):
+        self.archive()
+        with self.settings(VIEW_COUNT=3):
+            url = reverse('posts:profile', args=(self.user.username,))
+            first = self.client.get(url).context['page_obj']
+            second = self.client.get(url, {'page': 2}).context['page_obj']
+        self.assertEqual(first.paginator.count, 4)
+        self.assertEqual(first[0].pk, self.new_post.pk)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
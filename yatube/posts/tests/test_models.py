@@ -1,7 +1,14 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
 from posts.models import Group, Post, User
+from posts.rendering import RENDERER_VERSION
 
 User = get_user_model()
 
@@ -41,3 +48,72 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     post._meta.get_field(value).verbose_name, expected)
+
+
+class PostRenderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+
+    def test_text_html_is_rendered_on_save(self):
+        post = Post.objects.create(author=self.user,
+                                   text='<b>Первая</b>\nвторая')
+        self.assertEqual(post.text_html,
+                         '&lt;b&gt;Первая&lt;/b&gt;<br>вторая')
+        post.text = 'Новый\nтекст'
+        post.save(update_fields=('text',))
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'Новый<br>текст')
+        self.assertEqual(post.text_version, RENDERER_VERSION)
+
+    def test_rerender_posts_updates_stale_rows(self):
+        post = Post.objects.create(author=self.user, text='a\nb')
+        Post.objects.filter(pk=post.pk).update(text_html='',
+                                               text_version=0)
+        call_command('rerender_posts', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'a<br>b')
+        self.assertEqual(post.text_version, RENDERER_VERSION)
+
+    @override_settings(PREVIEW_LENGTH=10)
+    def test_long_text_gets_truncated_preview(self):
+        post = Post.objects.create(author=self.user,
+                                   text='Очень длинный\nтекст поста')
+        self.assertTrue(post.truncated)
+        self.assertEqual(post.preview, 'Очень дли…')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'читать далее')
+        self.assertNotContains(response, 'текст поста')
+
+    def test_bulk_paths_keep_html_fresh(self):
+        [post] = Post.objects.bulk_create(
+            [Post(author=self.user, text='a\nb')])
+        post = Post.objects.get(text='a\nb')
+        self.assertEqual(post.text_html, 'a<br>b')
+        post.text = 'c\nd'
+        Post.objects.bulk_update([post], ['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'c<br>d')
+        Post.objects.filter(pk=post.pk).update(
+            text=Concat(F('text'), Value('\ne')))
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'c<br>d<br>e')
+        self.assertEqual(post.preview, 'c<br>d<br>e')
+
+    def test_post_detail_falls_back_to_text(self):
+        post = Post.objects.create(author=self.user, text='Без\nHTML')
+        Post.objects.filter(pk=post.pk).update(text_html='')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, 'Без<br>HTML')
+
+    def test_post_card_falls_back_to_text(self):
+        post = Post.objects.create(author=self.user,
+                                   text='Без\n<b>отрывка</b>')
+        Post.objects.filter(pk=post.pk).update(preview='', text_version=0)
+        for rows in (False, True):
+            with self.subTest(rows=rows), self.settings(FEED_ROWS=rows):
+                response = self.client.get(
+                    reverse('posts:profile', args=(self.user.username,)))
+                self.assertContains(response,
+                                    'Без<br>&lt;b&gt;отрывка&lt;/b&gt;')
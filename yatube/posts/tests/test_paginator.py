@@ -2,10 +2,13 @@ import math
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.db import transaction
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.templatetags.pagination import page_window
 from ..models import Group, Post
 
 User = get_user_model()
@@ -57,3 +60,36 @@ class PaginatorViewsTest(TestCase):
                 )
                 self.assertEqual(len(response.context['page_obj']),
                                  expected_last_page_post_count)
+
+
+class PageWindowTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+
+    def grow_to_pages(self, pages):
+        missing = pages * settings.VIEW_COUNT - Post.objects.count()
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Пост') for _ in range(missing))
+
+    def index_size(self, page):
+        cache.clear()
+        response = self.client.get(reverse('posts:index'), {'page': page})
+        return len(response.content)
+
+    def test_response_size_does_not_grow_with_page_count(self):
+        self.grow_to_pages(20)
+        small = self.index_size(10)
+        self.grow_to_pages(200)
+        # Отличаются только цифры номера последней страницы и id постов;
+        # ссылка на каждую из 180 новых страниц добавила бы ~100 байт.
+        self.assertLess(self.index_size(10) - small, 100)
+
+    def test_window_around_current_page(self):
+        self.grow_to_pages(50)
+        page = Paginator(Post.objects.all(), settings.VIEW_COUNT).page(10)
+        with self.settings(PAGE_WINDOW=2):
+            self.assertEqual(page_window(page),
+                             [1, None, 8, 9, 10, 11, 12, None, 50])
+            self.assertEqual(page_window(page.paginator.page(2)),
+                             [1, 2, 3, 4, None, 50])
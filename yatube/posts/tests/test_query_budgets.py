@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import QueryPlanTestMixin
+
+from ..cache import feed_version
+from ..models import Comment, Follow, Group, Post, User
+
+# Максимум запросов к БД на один запрос к странице. Число не должно
+# зависеть от количества постов, комментариев и подписок. Управление
+# транзакциями (BEGIN, SAVEPOINT) не считается.
+QUERY_BUDGETS = {
+    'posts:index': 2,
+    'posts:group_list': 3,
+    'posts:profile': 5,
+    'posts:post_detail': 4,
+    'posts:post_edit': 2,
+    'posts:post_create': 1,
+    'posts:add_comment': 2,
+    'posts:follow_index': 2,
+    'posts:profile_follow': 5,
+    'posts:profile_unfollow': 2,
+}
+
+# Формы запросов, которым разрешено читать всю таблицу: счётчик всей
+# ленты и лента подписок, которая сливает посты нескольких авторов.
+ACCEPTED_SCANS = {
+    'posts:index': [r'^SELECT COUNT\(\*\)'],
+    'posts:follow_index': [r'INNER JOIN "posts_follow"'],
+}
+
+DATASET_SIZES = (1, 10, 100)
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class QueryBudgetTests(QueryPlanTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Описание тестовой группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(QueryBudgetTests.reader)
+        self.author_client = Client()
+        self.author_client.force_login(QueryBudgetTests.author)
+
+    def grow_dataset(self, size):
+        """Доводит число постов, комментариев и подписок до size."""
+        missing = size - Post.objects.count()
+        Post.objects.bulk_create(
+            Post(author=self.author, group=self.group, text=f'Пост {n}')
+            for n in range(missing)
+        )
+        Comment.objects.bulk_create(
+            Comment(author=self.reader, post=self.post, text='Комментарий')
+            for _ in range(size - self.post.comments.count())
+        )
+        User.objects.bulk_create(
+            User(username=f'follower-{size}-{n}')
+            for n in range(size - self.author.following.count())
+        )
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=self.author)
+            for follower in User.objects.filter(
+                username__startswith=f'follower-{size}-')
+        )
+
+    def routes(self):
+        author = {'username': self.author.username}
+        post = {'post_id': self.post.pk}
+        return [
+            ('posts:index', self.client, 'get', {}, None),
+            ('posts:group_list', self.client, 'get',
+             {'slug': self.group.slug}, None),
+            ('posts:profile', self.client, 'get', author, None),
+            ('posts:post_detail', self.client, 'get', post, None),
+            ('posts:post_edit', self.author_client, 'get', post, None),
+            ('posts:post_create', self.client, 'get', {}, None),
+            ('posts:add_comment', self.client, 'post', post,
+             {'text': 'Новый комментарий'}),
+            ('posts:follow_index', self.client, 'get', {}, None),
+            ('posts:profile_unfollow', self.client, 'get', author, None),
+            ('posts:profile_follow', self.client, 'get', author, None),
+        ]
+
+    def measure(self, client, method, url, data):
+        # Прогрев сессии и пользователя в кэше.
+        client.get(reverse('about:author'))
+        cache.delete(make_template_fragment_key('index', [1, feed_version()]))
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data)
+        self.assertLess(response.status_code, 400, url)
+        return [query['sql'] for query in queries.captured_queries
+                if not query['sql'].startswith(TRANSACTION_STATEMENTS)]
+
+    def test_query_counts_fit_budget_and_do_not_grow(self):
+        counts = {}
+        for size in DATASET_SIZES:
+            self.grow_dataset(size)
+            for name, client, method, kwargs, data in self.routes():
+                url = reverse(name, kwargs=kwargs)
+                queries = self.measure(client, method, url, data)
+                listing = '\n'.join(queries)
+                with self.subTest(name=name, size=size):
+                    self.assertLessEqual(
+                        len(queries), QUERY_BUDGETS[name],
+                        f'{name} выполняет {len(queries)} запросов при '
+                        f'{size} постах:\n{listing}')
+                    self.assertEqual(
+                        len(queries), counts.setdefault(name, len(queries)),
+                        f'Число запросов {name} растёт вместе с данными '
+                        f'({size} постов):\n{listing}')
+
+    def test_queries_use_indexes(self):
+        self.grow_dataset(10)
+        for name, client, method, kwargs, data in self.routes():
+            url = reverse(name, kwargs=kwargs)
+            client.get(reverse('about:author'))
+            with self.subTest(name=name), self.assertNoFullScans(
+                    allowed=ACCEPTED_SCANS.get(name, ())):
+                getattr(client, method)(url, data)
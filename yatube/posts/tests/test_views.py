@@ -157,3 +157,36 @@ class FollowTests(TestCase):
                 author=self.user_following
             ).exists()
         )
+
+
+class FeedRowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(15):
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+
+    def render(self, name, **kwargs):
+        cache.clear()
+        return self.client.get(reverse(name, kwargs=kwargs)).content
+
+    def test_rows_render_same_pages_as_models(self):
+        pages = (
+            ('posts:index', {}),
+            ('posts:group_list', {'slug': self.group.slug}),
+            ('posts:profile', {'username': self.user.username}),
+        )
+        for name, kwargs in pages:
+            with self.subTest(name=name):
+                expected = self.render(name, **kwargs)
+                with self.settings(FEED_ROWS=True):
+                    self.assertEqual(self.render(name, **kwargs), expected)
+
+    def test_rows_share_author_objects(self):
+        with self.settings(FEED_ROWS=True):
+            response = self.client.get(reverse('posts:index'))
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 10)
+        self.assertEqual(len({id(post.author) for post in page}), 1)
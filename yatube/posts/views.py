@@ -5,11 +5,19 @@ from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.db import atomic_write, small_write
+from core.ratelimit import ratelimit
+from posts.archive import ChainedPosts
+from posts.cache import feed_version
+from posts.feed import feed
 from posts.forms import CommentForm, PostForm
-from posts.models import Group, Post, Follow
+from posts.models import ArchivedPost, Group, Post, Follow
 
 User = get_user_model()
 
+# Карточкам в лентах нужен только сохранённый отрывок.
+FULL_TEXT_FIELDS = ('text', 'text_html')
+
 
 def page_look(post_list, page_number):
     paginator = Paginator(post_list, settings.VIEW_COUNT)
@@ -18,17 +26,24 @@ def page_look(post_list, page_number):
 
 
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
-    page_obj = page_look(post_list, request.GET.get('page'))
+    post_list = (Post.objects
+                 .select_related('author', 'group')
+                 .defer(*FULL_TEXT_FIELDS)
+                 .filter(author__is_active=True))
+    page_obj = page_look(feed(post_list), request.GET.get('page'))
     context = {
         'page_obj': page_obj,
+        'feed_version': feed_version(),
     }
     return render(request, 'posts/index.html', context)
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.select_related('group')
+    author = get_object_or_404(User, username=username, is_active=True)
+    author_posts = ChainedPosts(
+        feed(author.posts.select_related('group').defer(*FULL_TEXT_FIELDS)),
+        feed(author.archived_posts.select_related('group').defer(
+            *FULL_TEXT_FIELDS)))
     page_obj = page_look(author_posts, request.GET.get('page'))
     following = request.user.is_authenticated and author.following.filter(
         user=request.user).exists()
@@ -41,11 +56,24 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.count()
-    comments = post.comments.select_related('author')
+    archived = False
+    try:
+        # get() снимает сортировку: ORDER BY по одной строке SQLite всё
+        # равно делает через временное B-дерево.
+        post = Post.objects.select_related('author', 'group').get(
+            pk=post_id, author__is_active=True)
+    except Post.DoesNotExist:
+        archived = True
+        post = get_object_or_404(
+            ArchivedPost.objects.select_related('author', 'group'),
+            pk=post_id, author__is_active=True)
+    posts_count = (post.author.posts.count()
+                   + post.author.archived_posts.count())
+    comments = post.comments.select_related('author').filter(
+        author__is_active=True)
     context = {
         'post': post,
+        'archived': archived,
         'posts_count': posts_count,
         'form': CommentForm(),
         'comments': comments,
@@ -55,8 +83,11 @@ def post_detail(request, post_id):
 
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
-    page_obj = page_look(post_list, request.GET.get('page'))
+    post_list = (group.posts
+                 .select_related('author')
+                 .defer(*FULL_TEXT_FIELDS)
+                 .filter(author__is_active=True))
+    page_obj = page_look(feed(post_list), request.GET.get('page'))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -64,13 +95,14 @@ def group_list(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@ratelimit('post_create', methods=('POST',))
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post_create = form.save(commit=False)
         post_create.author = request.user
-        post_create.save()
+        atomic_write(post_create.save)
         return redirect('posts:profile', post_create.author)
     template = 'posts/post_create.html'
     context = {'form': form}
@@ -81,7 +113,7 @@ def post_create(request):
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         messages.error(request, 'You are not authorized to edit this post.')
         return redirect('posts:post_detail', post_id)
 
@@ -91,7 +123,7 @@ def post_edit(request, post_id):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        atomic_write(post.save)
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -101,6 +133,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+@ratelimit('add_comment', methods=('POST',))
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -109,7 +142,7 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        small_write(comment.save)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -117,19 +150,23 @@ def add_comment(request, post_id):
 def follow_index(request):
     post_list = (Post.objects
                  .select_related('author', 'group')
-                 .filter(author__following__user=request.user))
-    page_obj = page_look(post_list, request)
+                 .defer(*FULL_TEXT_FIELDS)
+                 .filter(author__following__user=request.user,
+                         author__is_active=True))
+    page_obj = page_look(feed(post_list), request)
     context = {
         'page_obj': page_obj
     }
     return render(request, 'posts/follow.html', context)
 
 
+@ratelimit('profile_follow')
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User, username=username, is_active=True)
     if request.user != author:
-        Follow.objects.get_or_create(
+        small_write(
+            Follow.objects.get_or_create,
             user=request.user,
             author=author
         )
@@ -138,6 +175,7 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(
-        user=request.user, author__username=username).delete()
+    author = get_object_or_404(User, username=username)
+    small_write(Follow.objects.filter(
+        user=request.user, author=author).delete)
     return redirect('posts:profile', username)
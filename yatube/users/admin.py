@@ -0,0 +1,45 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from .deletion import deactivate
+from .models import PendingDeletion
+
+User = get_user_model()
+
+
+class UserAdmin(BaseUserAdmin):
+    """Удаление пользователя - только отложенное, через reap_users.
+
+    Обычное удаление запускает сборщик каскада, который загружает всю
+    историю пользователя в память.
+    """
+    actions = ('schedule_deletion',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def schedule_deletion(self, request, queryset):
+        users = list(queryset.exclude(pk=request.user.pk))
+        for user in users:
+            deactivate(user)
+        self.message_user(
+            request, f'Отключено и поставлено в очередь на удаление: '
+                     f'{len(users)}.')
+    schedule_deletion.short_description = 'Отключить и удалить позже'
+    schedule_deletion.allowed_permissions = ('change',)
+
+
+class PendingDeletionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'requested')
+    list_select_related = ('user',)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
+admin.site.register(PendingDeletion, PendingDeletionAdmin)
@@ -0,0 +1,45 @@
+from django.db.models import Q
+
+from core.db import atomic_write
+from posts.bulk import delete_in_chunks, delete_posts, delete_with_images
+from posts.cache import bump_feed_version
+from posts.models import ArchivedComment, Comment, Follow
+from .models import PendingDeletion
+
+
+def _deactivate(user):
+    user.is_active = False
+    user.save(update_fields=('is_active',))
+    PendingDeletion.objects.get_or_create(user=user)
+
+
+def deactivate(user):
+    """Сразу скрывает пользователя и ставит его в очередь на удаление.
+
+    Неактивного пользователя не пускает вход, а его посты и комментарии
+    исключаются из лент, профиля и страницы поста.
+    """
+    atomic_write(_deactivate, user)
+    bump_feed_version()
+
+
+def reap(user, size=None):
+    """Удаляет пользователя и все его строки пачками.
+
+    К моменту user.delete() зависимых строк почти не остаётся, и
+    каскадное удаление Django не загружает историю целиком. Снова
+    включённого пользователя не трогает, а только снимает с очереди;
+    возвращает, был ли пользователь удалён.
+    """
+    user.refresh_from_db(fields=('is_active',))
+    if user.is_active:
+        PendingDeletion.objects.filter(user=user).delete()
+        return False
+    delete_in_chunks(Comment.objects.filter(author=user), size=size)
+    delete_in_chunks(ArchivedComment.objects.filter(author=user), size=size)
+    delete_in_chunks(Follow.objects.filter(Q(user=user) | Q(author=user)),
+                     size=size)
+    delete_posts(user.posts.all(), size=size)
+    delete_with_images(user.archived_posts.all(), size=size)
+    atomic_write(user.delete)
+    return True
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.deletion import reap
+from users.models import PendingDeletion
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователей, отключённых через админку, пачками '
+            'по --batch-size строк в отдельных транзакциях.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.BULK_CHUNK_SIZE)
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Сколько пользователей удалить за запуск.')
+
+    def handle(self, *args, **options):
+        pending = PendingDeletion.objects.select_related('user')
+        reaped = 0
+        for entry in pending[:options['limit']]:
+            if not reap(entry.user, size=options['batch_size']):
+                self.stdout.write(f'Пользователь {entry.user.username} '
+                                  f'снова активен, снят с очереди')
+                continue
+            reaped += 1
+            self.stdout.write(f'Удалён пользователь {entry.user.username}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено пользователей: {reaped}'))
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class PendingDeletion(models.Model):
+    """Отключённая учётная запись, которую удалит команда reap_users."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='pending_deletion',
+                                verbose_name='Пользователь')
+    requested = models.DateTimeField(auto_now_add=True,
+                                     verbose_name='Дата запроса')
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+        ordering = ('requested',)
+
+    def __str__(self):
+        return str(self.user)
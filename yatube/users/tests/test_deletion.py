@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User
+from ..deletion import deactivate
+from ..models import PendingDeletion
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UserDeletionTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='prolific')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(
+            text='Пост с картинкой', author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        for i in range(4):
+            post = Post.objects.create(text=f'Пост {i}', author=self.user)
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Чужой комментарий')
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Свой комментарий')
+        self.reader_post = Post.objects.create(text='Пост читателя',
+                                               author=self.reader)
+        Comment.objects.create(post=self.reader_post, author=self.user,
+                               text='Комментарий у читателя')
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def test_deactivated_user_is_hidden(self):
+        deactivate(self.user)
+        self.assertTrue(PendingDeletion.objects.filter(
+            user=self.user).exists())
+        index = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post.pk for post in index.context['page_obj']],
+            [self.reader_post.pk])
+        profile = self.client.get(
+            reverse('posts:profile', args=(self.user.username,)))
+        self.assertEqual(profile.status_code, 404)
+        detail = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertEqual(detail.status_code, 404)
+        reader_detail = self.client.get(
+            reverse('posts:post_detail', args=(self.reader_post.pk,)))
+        self.assertFalse(reader_detail.context['comments'])
+
+    def test_reap_deletes_rows_and_images(self):
+        image = os.path.join(TEMP_MEDIA_ROOT, self.post.image.name)
+        self.assertTrue(os.path.exists(image))
+        deactivate(self.user)
+        call_command('reap_users', batch_size=2, stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(PendingDeletion.objects.exists())
+        self.assertFalse(os.path.exists(image))
+
+    def test_reactivated_user_is_not_reaped(self):
+        deactivate(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        output = StringIO()
+        call_command('reap_users', stdout=output)
+        self.assertIn('снова активен', output.getvalue())
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(self.user.posts.count(), 5)
+        self.assertFalse(PendingDeletion.objects.exists())
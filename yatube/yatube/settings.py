@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,6 +27,9 @@ SECRET_KEY = '@_b_in)2bimon!hov4m7vb+cwmw6c4d97$z@+l)mkn94_g^%!4'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# manage.py test или pytest.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -49,15 +54,28 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.tracing.TracingMiddleware',
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.querycheck.QueryCheckMiddleware',
+    'core.middleware.querycheck.QueryPlanMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ratelimit.RateLimitMiddleware',
+    'core.middleware.profiler.ProfilerMiddleware',
+    'core.middleware.memory.MemoryProfilerMiddleware',
+    'core.middleware.tracing.ViewTracingMiddleware',
 ]
 
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+USER_CACHE_TIMEOUT = 5 * 60
+
 ROOT_URLCONF = 'yatube.urls'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -65,8 +83,11 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                'core.loaders.FilesystemLoader',
+                'core.loaders.AppDirectoriesLoader',
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,19 +99,70 @@ TEMPLATES = [
     },
 ]
 
+# Те же шаблоны с кеширующим загрузчиком; их включает settings_production.
+CACHED_TEMPLATES = [{
+    **TEMPLATES[0],
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('core.loaders.CachedLoader', [
+                'core.loaders.FilesystemLoader',
+                'core.loaders.AppDirectoriesLoader',
+            ]),
+        ],
+    },
+}]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    # WAL: читатели не ждут писателя, писатель не ждёт читателей.
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ.
+    'cache_size': -64000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую. Копии
+# обновляет manage.py sync_replicas.
+DATABASE_REPLICAS = []
+
+for number, name in enumerate(
+        filter(None, os.environ.get('SQLITE_REPLICAS', '').split(','))):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': name,
+        'PRAGMAS': SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Пространства имён url, чьи view читают с реплик.
+REPLICA_APPS = ('posts',)
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -145,3 +217,162 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Счётчики лимитов лежат в кеше по умолчанию. Локальный кеш годится для
+# одного процесса; с несколькими воркерами нужен общий, см.
+# settings_production.
+RATELIMIT_ENABLED = True
+
+RATELIMIT_RATES = {
+    'post_create': {'user': '20/m', 'ip': '60/m'},
+    'add_comment': {'user': '30/m', 'ip': '90/m'},
+    'profile_follow': {'user': '30/m', 'ip': '90/m'},
+    'signup': {'ip': '10/h'},
+    'login': {'ip': '30/m'},
+    'password_reset': {'ip': '10/h'},
+}
+
+RATELIMIT_VIEWS = {
+    'users:login': 'login',
+    'login': 'login',
+    'users:password_reset_form': 'password_reset',
+    'password_reset': 'password_reset',
+}
+
+METRICS_PREFIX = 'yatube_'
+
+# Каталог для файлов метрик при нескольких процессах; None - только память.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+METRICS_FLUSH_INTERVAL = 5
+
+# /metrics открыт персоналу, запросам с заголовком Authorization:
+# Bearer <METRICS_TOKEN> и адресам из METRICS_ALLOWED_IPS.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Сверяется с REMOTE_ADDR. За nginx или другим локальным прокси все
+# клиенты приходят с 127.0.0.1, поэтому loopback сюда добавлять нельзя:
+# сборщику за прокси нужен METRICS_TOKEN.
+METRICS_ALLOWED_IPS = ()
+
+METRICS_BUCKETS = {
+    'request_duration_seconds': (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    'request_db_duration_seconds': (
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    'request_queries': (1, 2, 3, 5, 10, 20, 50, 100),
+    'request_template_duration_seconds': (
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    'response_size_bytes': (
+        1024, 4096, 16384, 65536, 262144, 1048576),
+    'db_lock_wait_seconds': (
+        0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5),
+    'request_peak_memory_bytes': (
+        65536, 262144, 1048576, 4194304, 16777216, 67108864),
+}
+
+QUERYCHECK_ENABLED = DEBUG
+
+# В тестах повторные запросы роняют тест, а не пишутся в лог.
+QUERYCHECK_RAISE = TESTING
+
+QUERYCHECK_REPEAT_THRESHOLD = 5
+
+# Формы запросов, которые не проверяются. sorl-thumbnail ищет ключ в
+# thumbnail_kvstore перед каждой записью, но только пока миниатюра создаётся
+# впервые; дальше ключи читаются из кеша.
+QUERYCHECK_IGNORED = (r'"thumbnail_kvstore"',)
+
+DB_WRITE_RETRIES = 5
+
+# Базовая пауза перед повтором записи, секунды; растёт вдвое с джиттером.
+DB_WRITE_BACKOFF = 0.05
+
+# Мелкие записи (подписки, комментарии) через один поток-писатель.
+DB_WRITE_BATCHING = False
+
+DB_WRITE_BATCH_SIZE = 50
+
+DB_WRITE_BATCH_WINDOW = 0.005
+
+# Посты старше этого срока archive_posts переносит в архивные таблицы.
+ARCHIVE_AFTER_DAYS = 2 * 365
+
+# Выше этого числа строк счётчики в админке приблизительные.
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Массовые операции в админке идут пачками по столько строк.
+BULK_CHUNK_SIZE = 500
+
+# Больше стольких объектов операция выполняется в фоновом потоке.
+BACKGROUND_JOB_THRESHOLD = 5000
+
+JOBS_TIMEOUT = 24 * 60 * 60
+
+# Длина отрывка в карточке поста; после изменения нужен rerender_posts --all.
+PREVIEW_LENGTH = 300
+
+# Ленты строятся из лёгких строк posts.feed.FeedPost вместо моделей Post.
+FEED_ROWS = False
+
+# Сколько номеров страниц показывать по обе стороны от текущей.
+PAGE_WINDOW = 3
+
+TEMPLATES_PRECOMPILE = False
+
+PROFILER_ENABLED = True
+
+# Снимки профилировщика: <url name>/<время>-<id>.prof или .collapsed.
+PROFILER_DIR = os.environ.get(
+    'PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'yatube-profiles'))
+
+# Сколько снимков хранить на каждый url.
+PROFILER_KEEP = 20
+
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+
+PROFILER_SAMPLING_INTERVAL = 0.001
+
+# Доля запросов, попадающих в трассировку (0 - только с traceparent).
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0))
+
+# Трассы в формате OTLP/JSON, по строке на запрос.
+TRACING_FILE = os.environ.get(
+    'TRACING_FILE', os.path.join(tempfile.gettempdir(), 'yatube-traces.jsonl'))
+
+TRACING_SERVICE_NAME = 'yatube'
+
+# traceparent учитывается только от этих адресов (прокси, соседние сервисы).
+TRACING_TRUSTED_IPS = ()
+
+# Размер файла трасс до ротации и число хранимых старых файлов.
+TRACING_FILE_MAX_BYTES = 50 * 1024 * 1024
+
+TRACING_FILE_BACKUPS = 3
+
+THUMBNAIL_BACKEND = 'core.thumbnail.TracingThumbnailBackend'
+
+# Замеры памяти tracemalloc: включаются здесь, снимается доля запросов.
+MEMORY_PROFILE_ENABLED = False
+
+MEMORY_PROFILE_SAMPLE_RATE = float(
+    os.environ.get('MEMORY_PROFILE_SAMPLE_RATE', 0.01))
+
+# Глубина стека, которую хранит tracemalloc для каждого выделения.
+MEMORY_PROFILE_FRAMES = 1
+
+# Сколько мест выделения сохранять в каждом замере.
+MEMORY_PROFILE_TOP = 25
+
+MEMORY_PROFILE_DIR = os.environ.get(
+    'MEMORY_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'yatube-memory'))
+
+MEMORY_PROFILE_KEEP = 20
+
+# Стейджинг: EXPLAIN QUERY PLAN для каждой новой формы запроса.
+QUERYPLAN_ENABLED = False
+
+# Планы, по строке JSON на форму запроса; отчёт - manage.py queryplans.
+QUERYPLAN_FILE = os.environ.get(
+    'QUERYPLAN_FILE',
+    os.path.join(tempfile.gettempdir(), 'yatube-queryplans.jsonl'))
@@ -0,0 +1,50 @@
+"""
+Настройки для продакшена поверх yatube.settings.
+
+DJANGO_SETTINGS_MODULE=yatube.settings_production. Секретный ключ
+берётся только из DJANGO_SECRET_KEY. Статика отдаётся через
+ManifestStaticFilesStorage, поэтому перед запуском нужен collectstatic.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHED_TEMPLATES
+
+DEBUG = False
+
+# Ключ из settings.py лежит в репозитории: им нельзя подписывать сессии,
+# ссылки сброса пароля и токены профилировщика.
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Не задана переменная DJANGO_SECRET_KEY.')
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+TEMPLATES = CACHED_TEMPLATES
+
+# Разобрать все шаблоны при старте wsgi, а не на первых запросах.
+TEMPLATES_PRECOMPILE = True
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage')
+
+QUERYCHECK_ENABLED = False
+
+# Лимиты частоты запросов и кеш пользователей должны быть общими для всех
+# воркеров: иначе каждый процесс считает свои запросы. Без
+# MEMCACHED_LOCATION (host:port, нужен пакет python-memcached) check
+# выдаёт предупреждение core.W001.
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.environ['MEMCACHED_LOCATION'],
+        },
+    }
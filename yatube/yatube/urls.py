@@ -19,12 +19,18 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics, profile_capture, profiles
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('metrics', metrics, name='metrics'),
+    path('profiles/', profiles, name='profiles'),
+    path('profiles/<str:directory>/<str:filename>', profile_capture,
+         name='profile_capture'),
 ]
 
 if settings.DEBUG: